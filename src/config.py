@@ -20,20 +20,32 @@ class Settings(BaseSettings):
         default="openai/gpt-4o-mini",
         alias="OPENROUTER_MODEL"
     )
+    # Comma-separated OpenRouter providers to try first (e.g. "OpenAI,Azure")
+    OPENROUTER_PROVIDER_ORDER: str = Field(
+        default="",
+        alias="OPENROUTER_PROVIDER_ORDER"
+    )
+    
+    # Review Configuration
+    # Send all selected agents to the LLM in one request instead of one per agent
+    BATCH_AGENT_CALLS: bool = Field(default=False, alias="BATCH_AGENT_CALLS")
+    # Cap on in-flight LLM requests across all reviews, to stay under provider rate limits
+    MAX_LLM_CONCURRENCY: int = Field(default=8, alias="MAX_LLM_CONCURRENCY")
+    # Directory for persisting agent results across restarts and CI runs (disabled if empty)
+    REVIEW_CACHE_DIR: str = Field(default="", alias="REVIEW_CACHE_DIR")
     
     # Server Configuration
     HOST: str = Field(default="0.0.0.0", alias="HOST")
     PORT: int = Field(default=8000, alias="PORT")
+    SERVE_STATIC: bool = Field(default=True, alias="SERVE_STATIC")
+    DEV: bool = Field(default=False, alias="DEV")
     
     class Config:
         env_file = ".env"
         case_sensitive = False
 
 
-@lru_cache()
+@lru_cache(maxsize=1)
 def get_settings() -> Settings:
     """Get cached settings instance."""
     return Settings()
-
-
-settings = get_settings()
@@ -1,36 +1,65 @@
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import FastAPI, HTTPException, Query, Depends, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import HTMLResponse, ORJSONResponse, Response
 from pydantic import BaseModel, Field
 from typing import List, Optional
-import os
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from pathlib import Path
+import hashlib
 
+from src.config import get_settings
 from src.services.pr_review_service import PRReviewService
 
+STATIC_DIR = Path(__file__).with_name("static")
+INDEX_HTML_PATH = STATIC_DIR / "index.html"
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Apply settings-dependent setup at startup, so importing the app needs no environment."""
+    # Skip the mount when assets are served by a reverse proxy
+    if get_settings().SERVE_STATIC and STATIC_DIR.is_dir():
+        app.mount("/static", StaticFiles(directory=STATIC_DIR), name="static")
+    yield
+
+
 app = FastAPI(
     title="PR Review AI",
     description="AI-powered Pull Request review system with specialized agents",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 
+CORS_ALLOW_ORIGINS = ["*"]
+
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],
+    allow_origins=CORS_ALLOW_ORIGINS,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
 )
 
-app.mount("/static", StaticFiles(directory="src/static"), name="static")
 
-pr_review_service = PRReviewService()
+@lru_cache(maxsize=1)
+def get_pr_review_service() -> PRReviewService:
+    """Build the review service on first use instead of at import time."""
+    return PRReviewService()
+
 
 class ReviewRequest(BaseModel):
     pr_url: str = Field(..., description="GitHub Pull Request URL")
     agents: Optional[List[str]] = Field(
         None, 
-        description="List of specific agents to run. If omitted, all agents will run."
+        description="List of specific agents to run. If omitted, the agents relevant to the changed file types run (every agent for source code)."
+    )
+    include_raw: bool = Field(
+        True,
+        description="Include each agent's issue list in agent_results. Set to false to get issue_count instead; every issue is also in the top-level issues."
     )
 
 class DiffReviewRequest(BaseModel):
@@ -39,23 +68,79 @@ class DiffReviewRequest(BaseModel):
     pr_description: Optional[str] = Field(None, description="PR description")
     agents: Optional[List[str]] = Field(
         None,
-        description="List of specific agents to run. If omitted, all agents will run."
+        description="List of specific agents to run. If omitted, the agents relevant to the changed file types run (every agent for source code)."
+    )
+    include_raw: bool = Field(
+        True,
+        description="Include each agent's issue list in agent_results. Set to false to get issue_count instead; every issue is also in the top-level issues."
     )
 
+@lru_cache(maxsize=1)
+def _load_index_html() -> Optional[bytes]:
+    """Read the frontend once; the file is static for the process lifetime."""
+    if not INDEX_HTML_PATH.is_file():
+        return None
+    return INDEX_HTML_PATH.read_bytes()
+
+
+@lru_cache(maxsize=1)
+def _index_etag() -> Optional[str]:
+    """Content hash of the cached frontend, used for conditional GETs."""
+    index_html = _load_index_html()
+    if index_html is None:
+        return None
+    return f'"{hashlib.blake2b(index_html, digest_size=8).hexdigest()}"'
+
+
 @app.get("/", response_class=HTMLResponse)
-async def root():
-    html_path = os.path.join("src", "static", "index.html")
-    if os.path.exists(html_path):
-        with open(html_path, "r", encoding="utf-8") as f:
-            return HTMLResponse(content=f.read())
+async def root(request: Request):
+    index_html = _load_index_html()
+    if index_html is not None:
+        etag = _index_etag()
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers={"etag": etag})
+        return HTMLResponse(
+            content=index_html,
+            headers={"etag": etag, "cache-control": "public, max-age=60"}
+        )
     return HTMLResponse(content="<h1>PR Review AI</h1><p>Frontend not found. Please access /api/docs for API documentation.</p>")
 
+@app.exception_handler(Exception)
+async def global_exception_handler(request: Request, exc: Exception):
+    """
+    Turn unexpected errors into the API's 500 error shape.
+    
+    Starlette runs this handler outside CORSMiddleware, so the CORS headers
+    it would have added are set here to keep the error readable cross-origin.
+    """
+    headers = {}
+    origin = request.headers.get("origin")
+    if origin and ("*" in CORS_ALLOW_ORIGINS or origin in CORS_ALLOW_ORIGINS):
+        # Credentials are allowed, so the origin is echoed rather than "*"
+        headers = {
+            "access-control-allow-origin": origin,
+            "access-control-allow-credentials": "true",
+            "vary": "Origin"
+        }
+    return ORJSONResponse(
+        status_code=500,
+        content={
+            "detail": {
+                "error": "Internal server error",
+                "message": str(exc)
+            }
+        },
+        headers=headers
+    )
+
 @app.get("/health")
 async def health_check():
     return {"status": "healthy", "service": "PR Review AI"}
 
 @app.get("/api/agents")
-async def get_available_agents():
+async def get_available_agents(
+    pr_review_service: PRReviewService = Depends(get_pr_review_service)
+):
     agents = pr_review_service.get_available_agents()
     return {
         "agents": agents,
@@ -69,58 +154,65 @@ async def get_available_agents():
     }
 
 @app.post("/api/review")
-async def review_pull_request(request: ReviewRequest):
-    try:
-        result = pr_review_service.review_pr_from_url(
-            pr_url=request.pr_url,
-            selected_agents=request.agents
-        )
-        if "error" in result:
-            raise HTTPException(
-                status_code=400,
-                detail=result
-            )
-        return result
-    except Exception as e:
+async def review_pull_request(
+    request: ReviewRequest,
+    pr_review_service: PRReviewService = Depends(get_pr_review_service)
+):
+    # The review blocks on GitHub and LLM calls; keep it off the event loop so
+    # concurrent requests are served in parallel
+    result = await run_in_threadpool(
+        pr_review_service.review_pr_from_url,
+        pr_url=request.pr_url,
+        selected_agents=request.agents,
+        include_raw=request.include_raw
+    )
+    if "error" in result:
         raise HTTPException(
-            status_code=500,
-            detail={
-                "error": "Internal server error",
-                "message": str(e)
-            }
+            status_code=400,
+            detail=result
         )
+    # Review payloads are plain JSON-safe dicts; returning a Response
+    # directly skips FastAPI's jsonable_encoder pass over them
+    return ORJSONResponse(content=result)
 
 @app.post("/api/review/diff")
-async def review_diff(request: DiffReviewRequest):
-    try:
-        pr_info = None
-        if request.pr_title or request.pr_description:
-            pr_info = {
-                "title": request.pr_title or "Manual Review",
-                "description": request.pr_description or "",
-                "author": "manual",
-                "url": "manual"
-            }
-        result = pr_review_service.review_pr_from_diff(
-            diff=request.diff,
-            pr_info=pr_info,
-            selected_agents=request.agents
-        )
-        if "error" in result:
-            raise HTTPException(
-                status_code=400,
-                detail=result
-            )
-        return result
-    except Exception as e:
+async def review_diff(
+    request: DiffReviewRequest,
+    pr_review_service: PRReviewService = Depends(get_pr_review_service)
+):
+    pr_info = None
+    if request.pr_title or request.pr_description:
+        pr_info = {
+            "title": request.pr_title or "Manual Review",
+            "description": request.pr_description or "",
+            "author": "manual",
+            "url": "manual"
+        }
+    result = await run_in_threadpool(
+        pr_review_service.review_pr_from_diff,
+        diff=request.diff,
+        pr_info=pr_info,
+        selected_agents=request.agents,
+        include_raw=request.include_raw
+    )
+    if "error" in result:
         raise HTTPException(
-            status_code=500,
-            detail={
-                "error": "Internal server error",
-                "message": str(e)
-            }
+            status_code=400,
+            detail=result
         )
+    return ORJSONResponse(content=result)
 
 if __name__ == "__main__":
+    import os
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    settings = get_settings()
+    # reload=True runs a single worker under the reloader, so only fan out in production
+    uvicorn.run(
+        "src.main:app",
+        host=settings.HOST,
+        port=settings.PORT,
+        loop="uvloop",
+        http="httptools",
+        reload=settings.DEV,
+        workers=None if settings.DEV else os.cpu_count()
+    )
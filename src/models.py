@@ -1,9 +1,9 @@
 from pydantic import BaseModel, Field
 from typing import Optional, List, Dict, Any
-from enum import Enum
+from enum import StrEnum
 
 
-class ProgressType(str, Enum):
+class ProgressType(StrEnum):
     """Types of progress updates during PR review"""
     STARTED = "started"
     FETCHING_PR = "fetching_pr"
@@ -18,7 +18,10 @@ class ProgressType(str, Enum):
     ERROR = "error"
 
 
-class SeverityLevel(str, Enum):
+PROGRESS_VALUES = frozenset(pt.value for pt in ProgressType)
+
+
+class SeverityLevel(StrEnum):
     """Severity levels for findings"""
     CRITICAL = "critical"
     HIGH = "high"
@@ -27,6 +30,17 @@ class SeverityLevel(str, Enum):
     INFO = "info"
 
 
+SEVERITY_VALUES = frozenset(sl.value for sl in SeverityLevel)
+
+
+class LineComment(BaseModel):
+    """Comment anchored to a specific line of a file in the PR"""
+    path: str = Field(..., description="File path")
+    line: int = Field(..., description="Line number in the new version of the file")
+    body: str = Field(..., description="Comment body")
+    side: str = Field(default="RIGHT", description="Diff side the line refers to")
+
+
 class Finding(BaseModel):
     """Individual code review finding"""
     agent: str = Field(..., description="Agent that generated the finding")
@@ -34,7 +48,7 @@ class Finding(BaseModel):
     severity: SeverityLevel = Field(..., description="Severity level")
     findings: str = Field(..., description="Detailed finding description")
     has_issues: bool = Field(default=True, description="Whether issues were found")
-    line_comments: Optional[List[Dict[str, Any]]] = Field(default=None, description="Line-specific comments")
+    line_comments: Optional[List[LineComment]] = Field(default=None, description="Line-specific comments")
 
 
 class PRReviewRequest(BaseModel):
@@ -80,7 +94,7 @@ class PRReviewResponse(BaseModel):
     files_reviewed: Optional[int] = Field(default=None, description="Number of files reviewed")
     total_findings: Optional[int] = Field(default=None, description="Total findings count")
     summary: Optional[str] = Field(default=None, description="Review summary")
-    findings: Optional[List[Dict[str, Any]]] = Field(default=None, description="Detailed findings")
+    findings: Optional[List[Finding]] = Field(default=None, description="Detailed findings")
     error: Optional[str] = Field(default=None, description="Error message if failed")
 
 
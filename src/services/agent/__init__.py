@@ -1,11 +1,17 @@
 """Agent services for code review."""
-from .base_agent import BaseReviewAgent
-from .security_agent import SecurityAgent
-from .logic_agent import LogicAgent
-from .performance_agent import PerformanceAgent
-from .readability_agent import ReadabilityAgent
-from .test_coverage_agent import TestCoverageAgent
-from .orchestrator import OrchestratorAgent
+import importlib
+
+# Agents pull in LangChain, so they are only imported on first access.
+_LAZY = {
+    "BaseReviewAgent": ".base_agent",
+    "SecurityAgent": ".security_agent",
+    "LogicAgent": ".logic_agent",
+    "PerformanceAgent": ".performance_agent",
+    "ReadabilityAgent": ".readability_agent",
+    "TestCoverageAgent": ".test_coverage_agent",
+    "OrchestratorAgent": ".orchestrator",
+    "MultiAgentBatchAnalyzer": ".batch_agent",
+}
 
 __all__ = [
     "BaseReviewAgent",
@@ -15,4 +21,19 @@ __all__ = [
     "ReadabilityAgent",
     "TestCoverageAgent",
     "OrchestratorAgent",
+    "MultiAgentBatchAnalyzer",
 ]
+
+
+def __getattr__(name):
+    """Import agent classes on first attribute access."""
+    if name not in _LAZY:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    module = importlib.import_module(_LAZY[name], __name__)
+    value = getattr(module, name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
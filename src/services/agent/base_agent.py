@@ -1,10 +1,98 @@
 """Base agent class for code review agents."""
 from abc import ABC, abstractmethod
-from typing import Dict, Any, List
+from functools import lru_cache
+from typing import Dict, Any, List, Tuple
 from langchain_openai import ChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import JsonOutputParser
 import json
+import threading
+import orjson
+
+from src.services.github.diff_utils import budget_diff, is_unchanged_diff
+from .cache import get_review_cache
+
+
+# Diff size sent to the LLM per request, kept under the model's token limits
+MAX_DIFF_CHARS = 15000
+
+# Per-request LLM timeout; starts when the request is sent, so waiting for a
+# worker thread or an LLM slot does not count against it
+LLM_REQUEST_TIMEOUT_SECONDS = 60
+
+
+# Per-agent result schema, escaped for use inside ChatPromptTemplate text
+ANALYSIS_JSON_FORMAT = """{{
+    "severity": "critical|high|medium|low|info",
+    "issues": [
+        {{
+            "file": "filename",
+            "line": line_number,
+            "severity": "critical|high|medium|low|info",
+            "title": "brief title",
+            "description": "detailed description",
+            "suggestion": "recommended fix with explanation",
+            "suggested_code": "complete corrected code line or block that should replace the problematic code"
+        }}
+    ],
+    "summary": "overall summary of findings",
+    "score": 0-100
+}}"""
+
+# Ask the provider for a bare JSON object: no markdown fences or prose around it
+JSON_RESPONSE_FORMAT = {"type": "json_object"}
+
+NO_CHANGES_SUMMARY = "No added or removed lines to review."
+
+SUGGESTED_CODE_NOTE = 'IMPORTANT: For each issue, provide the complete corrected code in the "suggested_code" field. This should be the exact code that would replace the problematic line(s), ready to copy-paste.'
+
+
+class OrjsonOutputParser(JsonOutputParser):
+    """JsonOutputParser that decodes complete responses with orjson."""
+    
+    def parse_result(self, result, *, partial: bool = False):
+        if not partial:
+            text = result[0].text.strip()
+            # Models often wrap JSON in a ```json fence
+            if text.startswith("```"):
+                text = text.split("\n", 1)[-1].rsplit("```", 1)[0]
+            try:
+                return orjson.loads(text)
+            except orjson.JSONDecodeError:
+                pass
+        # Fall back to LangChain's lenient markdown/partial JSON handling
+        return super().parse_result(result, partial=partial)
+
+
+@lru_cache(maxsize=8)
+def _get_llm(
+    model_name: str,
+    temperature: float,
+    api_key: str,
+    base_url: str,
+    provider_order: Tuple[str, ...] = ()
+) -> ChatOpenAI:
+    """Return a shared LLM client (and connection pool) per configuration."""
+    # OpenRouter routing options: compress over-long prompts instead of failing,
+    # and prefer the configured (fastest) providers while keeping fallbacks
+    extra_body: Dict[str, Any] = {"transforms": ["middle-out"]}
+    if provider_order:
+        extra_body["provider"] = {"order": list(provider_order), "allow_fallbacks": True}
+    
+    return ChatOpenAI(
+        model=model_name,
+        temperature=temperature,
+        openai_api_key=api_key,
+        openai_api_base=base_url,
+        extra_body=extra_body,
+        timeout=LLM_REQUEST_TIMEOUT_SECONDS
+    )
+
+
+@lru_cache(maxsize=1)
+def _llm_semaphore(limit: int) -> threading.BoundedSemaphore:
+    """Return the process-wide semaphore bounding concurrent LLM requests."""
+    return threading.BoundedSemaphore(max(1, limit))
 
 
 class BaseReviewAgent(ABC):
@@ -15,6 +103,7 @@ class BaseReviewAgent(ABC):
         self.model_name = model_name
         self.temperature = temperature
         self.llm = None
+        self._chain = None
         self._initialize_llm()
     
     def _initialize_llm(self):
@@ -22,12 +111,20 @@ class BaseReviewAgent(ABC):
         from src.config import get_settings
         settings = get_settings()
         
-        self.llm = ChatOpenAI(
-            model=self.model_name,
-            temperature=self.temperature,
-            openai_api_key=settings.OPENROUTER_API_KEY,
-            openai_api_base="https://openrouter.ai/api/v1"
+        provider_order = tuple(
+            provider.strip()
+            for provider in settings.OPENROUTER_PROVIDER_ORDER.split(",")
+            if provider.strip()
+        )
+        self.llm = _get_llm(
+            self.model_name,
+            self.temperature,
+            settings.OPENROUTER_API_KEY,
+            settings.OPENROUTER_BASE_URL,
+            provider_order
         )
+        # Shared by every agent, so concurrent reviews queue instead of tripping 429s
+        self.llm_slots = _llm_semaphore(settings.MAX_LLM_CONCURRENCY)
     
     @abstractmethod
     def get_system_prompt(self) -> str:
@@ -39,6 +136,31 @@ class BaseReviewAgent(ABC):
         """Return the name of this agent."""
         pass
     
+    def _get_chain(self):
+        """Build the prompt | llm | parser chain once; the prompt text is static per agent."""
+        if self._chain is None:
+            # Everything that is the same on every call goes in the system
+            # message, so the provider can reuse its cached prompt prefix;
+            # only the PR itself follows in the user message
+            prompt = ChatPromptTemplate.from_messages([
+                ("system", self.get_system_prompt() + """
+
+Provide your analysis as JSON with the following structure:
+""" + ANALYSIS_JSON_FORMAT + """
+
+""" + SUGGESTED_CODE_NOTE),
+                ("user", """Analyze the following Pull Request:
+
+PR Title: {title}
+PR Description: {description}
+
+Diff:
+{diff}""")
+            ])
+            llm = self.llm.bind(response_format=JSON_RESPONSE_FORMAT)
+            self._chain = prompt | llm | OrjsonOutputParser()
+        return self._chain
+    
     def analyze(self, pr_diff: str, pr_info: Dict[str, Any]) -> Dict[str, Any]:
         """
         Analyze the PR diff and return structured feedback.
@@ -50,59 +172,57 @@ class BaseReviewAgent(ABC):
         Returns:
             Dict with analysis results in JSON format
         """
-        # Create prompt template
-        prompt = ChatPromptTemplate.from_messages([
-            ("system", self.get_system_prompt()),
-            ("user", """Analyze the following Pull Request:
-
-PR Title: {title}
-PR Description: {description}
-
-Diff:
-{diff}
-
-Provide your analysis as JSON with the following structure:
-{{
-    "severity": "critical|high|medium|low|info",
-    "issues": [
-        {{
-            "file": "filename",
-            "line": line_number,
-            "severity": "critical|high|medium|low|info",
-            "title": "brief title",
-            "description": "detailed description",
-            "suggestion": "recommended fix with explanation",
-            "suggested_code": "complete corrected code line or block that should replace the problematic code"
-        }}
-    ],
-    "summary": "overall summary of findings",
-    "score": 0-100
-}}
-
-IMPORTANT: For each issue, provide the complete corrected code in the "suggested_code" field. This should be the exact code that would replace the problematic line(s), ready to copy-paste.""")
-        ])
+        diff = budget_diff(pr_diff, MAX_DIFF_CHARS)
         
-        # Create chain with JSON parser
-        parser = JsonOutputParser()
-        chain = prompt | self.llm | parser
-        
-        try:
-            result = chain.invoke({
-                "title": pr_info.get("title", "N/A"),
-                "description": pr_info.get("description", "N/A"),
-                "diff": pr_diff[:15000]  # Limit diff size to avoid token limits
-            })
-            
-            # Add agent metadata
-            result["agent"] = self.get_agent_name()
-            return result
-            
-        except Exception as e:
+        # Renames, mode changes and generated-file-only PRs need no LLM call.
+        # Checked on the raw diff, since budgeting may have omitted hunks
+        if not diff.strip() or is_unchanged_diff(pr_diff):
             return {
                 "agent": self.get_agent_name(),
                 "severity": "info",
                 "issues": [],
-                "summary": f"Analysis failed: {str(e)}",
-                "score": 0,
-                "error": str(e)
+                "summary": NO_CHANGES_SUMMARY,
+                "score": 100
             }
+        
+        chain = self._get_chain()
+        
+        chain_input = {
+            "title": pr_info.get("title", "N/A"),
+            "description": pr_info.get("description", "N/A"),
+            "diff": diff
+        }
+        
+        # Identical inputs (re-runs, force-pushes without changes) skip the LLM.
+        # The prompt text is part of the key so persisted entries are not
+        # reused after the agent's instructions or output schema change.
+        cache_key = get_review_cache().make_key(
+            agent=self.get_agent_name(),
+            model=self.model_name,
+            temperature=self.temperature,
+            system_prompt=self.get_system_prompt(),
+            output_format=ANALYSIS_JSON_FORMAT + SUGGESTED_CODE_NOTE,
+            **chain_input
+        )
+        
+        def run_chain() -> Dict[str, Any]:
+            try:
+                with self.llm_slots:
+                    result = chain.invoke(chain_input)
+                
+                # Add agent metadata
+                result["agent"] = self.get_agent_name()
+                return result
+                
+            except Exception as e:
+                message = str(e)
+                return {
+                    "agent": self.get_agent_name(),
+                    "severity": "info",
+                    "issues": [],
+                    "summary": f"Analysis failed: {message}",
+                    "score": 0,
+                    "error": message
+                }
+        
+        return get_review_cache().get_or_compute(cache_key, run_chain)
@@ -0,0 +1,148 @@
+"""Single-request analyzer that runs several review agents in one LLM call."""
+from typing import Dict, Any, List, Tuple
+from langchain_core.prompts import ChatPromptTemplate
+
+from src.services.github.diff_utils import budget_diff, is_unchanged_diff
+from .base_agent import (
+    BaseReviewAgent,
+    OrjsonOutputParser,
+    ANALYSIS_JSON_FORMAT,
+    JSON_RESPONSE_FORMAT,
+    SUGGESTED_CODE_NOTE,
+    MAX_DIFF_CHARS,
+)
+from .cache import get_review_cache
+
+
+# Panel prompt; the reviewers' instructions and result keys are filled in per
+# call but are fixed for a given selection, so they stay in the system message
+# (the provider-cacheable prefix) ahead of the PR itself
+_PANEL_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", """You are a panel of specialist code reviewers. Each reviewer below has its own focus and instructions; review the Pull Request once per reviewer, keeping their findings separate.
+
+{panel}
+
+Respond with a single JSON object whose keys are {keys}. The value for each key is that reviewer's analysis with the following structure:
+""" + ANALYSIS_JSON_FORMAT + """
+
+""" + SUGGESTED_CODE_NOTE),
+    ("user", """Analyze the following Pull Request:
+
+PR Title: {title}
+PR Description: {description}
+
+Diff:
+{diff}""")
+])
+
+
+class MultiAgentBatchAnalyzer:
+    """
+    Combine several agents' instructions into one prompt so the diff is sent
+    (and prefilled) once instead of once per agent.
+
+    The response is a JSON object keyed by agent name, each value matching the
+    per-agent result schema produced by BaseReviewAgent.analyze.
+    """
+
+    def __init__(self, agents: Dict[str, BaseReviewAgent]):
+        """Initialize with the orchestrator's agent registry."""
+        self.agents = agents
+        self._chain = None
+        self._panels: Dict[Tuple[str, ...], Tuple[str, str]] = {}
+
+    def analyze(
+        self,
+        pr_diff: str,
+        pr_info: Dict[str, Any],
+        agent_names: List[str]
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Run the selected agents against the PR in a single LLM request.
+
+        Args:
+            pr_diff: The git diff of the PR
+            pr_info: Metadata about the PR (title, description, etc.)
+            agent_names: Registry keys of the agents to run
+
+        Returns:
+            Dict mapping each agent name to its analysis result
+        """
+        diff = budget_diff(pr_diff, MAX_DIFF_CHARS)
+        if not diff.strip() or is_unchanged_diff(pr_diff):
+            # Each agent returns its no-changes result without calling the LLM
+            return {name: self.agents[name].analyze(pr_diff, pr_info) for name in agent_names}
+
+        # All agents share the same model settings; use the first one's client
+        lead = self.agents[agent_names[0]]
+
+        panel, keys = self._get_panel(tuple(agent_names))
+
+        if self._chain is None:
+            llm = lead.llm.bind(response_format=JSON_RESPONSE_FORMAT)
+            self._chain = _PANEL_PROMPT | llm | OrjsonOutputParser()
+        chain = self._chain
+
+        chain_input = {
+            "panel": panel,
+            "keys": keys,
+            "title": pr_info.get("title", "N/A"),
+            "description": pr_info.get("description", "N/A"),
+            "diff": diff
+        }
+
+        # The panel carries each agent's system prompt; the schema is keyed too
+        cache_key = get_review_cache().make_key(
+            agent="batch",
+            model=lead.model_name,
+            temperature=lead.temperature,
+            output_format=ANALYSIS_JSON_FORMAT + SUGGESTED_CODE_NOTE,
+            **chain_input
+        )
+
+        def run_chain() -> Dict[str, Dict[str, Any]]:
+            try:
+                with lead.llm_slots:
+                    response = chain.invoke(chain_input)
+            except Exception as e:
+                return {name: self._failed(name, e) for name in agent_names}
+
+            results = {}
+            for name in agent_names:
+                result = response.get(name) if isinstance(response, dict) else None
+                if isinstance(result, dict):
+                    result["agent"] = self.agents[name].get_agent_name()
+                    results[name] = result
+                else:
+                    results[name] = self._failed(name, ValueError("No result returned for this agent"))
+            return results
+
+        # Only complete panels are cached; any agent failure means a retry next time
+        return get_review_cache().get_or_compute(
+            cache_key,
+            run_chain,
+            cacheable=lambda results: not any(r.get("error") for r in results.values())
+        )
+
+    def _get_panel(self, agent_names: Tuple[str, ...]) -> Tuple[str, str]:
+        """Render (and remember) the reviewer panel and result keys for a selection."""
+        cached = self._panels.get(agent_names)
+        if cached is None:
+            panel = "\n\n".join(
+                f"### Reviewer \"{name}\"\n{self.agents[name].get_system_prompt()}"
+                for name in agent_names
+            )
+            keys = ", ".join(f'"{name}"' for name in agent_names)
+            cached = self._panels[agent_names] = (panel, keys)
+        return cached
+
+    def _failed(self, name: str, error: Exception) -> Dict[str, Any]:
+        """Build the standard failure result for one agent."""
+        return {
+            "agent": self.agents[name].get_agent_name(),
+            "severity": "info",
+            "issues": [],
+            "summary": f"Analysis failed: {str(error)}",
+            "score": 0,
+            "error": str(error)
+        }
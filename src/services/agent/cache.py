@@ -0,0 +1,175 @@
+"""Response cache for review agent analyses."""
+from collections import OrderedDict
+from concurrent.futures import Future
+from functools import lru_cache
+from pathlib import Path
+from typing import Callable, Dict, Any, Optional, Tuple
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+import time
+
+import orjson
+
+
+logger = logging.getLogger(__name__)
+
+
+class ReviewCache:
+    """
+    Thread-safe LRU cache of agent analysis results with a time-to-live.
+
+    Agents run concurrently in the orchestrator's thread pool, so all access
+    goes through a lock. Results are stored as orjson-encoded bytes and decoded
+    on every hit, so callers that annotate issues in place (agent name, code
+    context) always get a private copy. Entries expire after ttl seconds so
+    prompt or model-side changes are eventually picked up.
+    
+    When disk_dir is set, results are also written there (one file per key)
+    so re-runs in a new process, such as CI retries, skip the LLM too. Disk
+    errors are logged and otherwise ignored; the cache never fails a review.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl: float = 3600,
+        disk_dir: Optional[str] = None,
+        disk_ttl: float = 7 * 24 * 3600
+    ):
+        """Initialize an empty cache holding at most max_entries results for ttl seconds."""
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        self.disk_ttl = disk_ttl
+        self._entries: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(**parts: Any) -> str:
+        """Build a stable BLAKE2b key from the inputs that determine a result."""
+        canonical = orjson.dumps(parts, option=orjson.OPT_SORT_KEYS)
+        return hashlib.blake2b(canonical, digest_size=16).hexdigest()
+    
+    def _lookup(self, key: str) -> Optional[bytes]:
+        """Return the live encoded entry for key, dropping it if expired. Caller holds the lock."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, encoded = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return encoded
+    
+    def _remember(self, key: str, encoded: bytes) -> None:
+        """Store encoded in memory, evicting the least recently used entry if full."""
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, encoded)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def _disk_get(self, key: str) -> Optional[bytes]:
+        """Return the encoded result stored on disk for key, if present and fresh."""
+        if self.disk_dir is None:
+            return None
+        path = self.disk_dir / f"{key}.json"
+        try:
+            if time.time() - path.stat().st_mtime > self.disk_ttl:
+                return None
+            return path.read_bytes()
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            logger.warning("Error reading review cache entry %s: %s", path, e)
+            return None
+    
+    def _disk_set(self, key: str, encoded: bytes) -> None:
+        """Atomically write an encoded result to disk."""
+        if self.disk_dir is None:
+            return
+        try:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.disk_dir, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(encoded)
+            os.replace(tmp_path, self.disk_dir / f"{key}.json")
+        except OSError as e:
+            logger.warning("Error writing review cache entry %s: %s", key, e)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return a copy of the cached result, or None on a miss."""
+        with self._lock:
+            encoded = self._lookup(key)
+        if encoded is None:
+            encoded = self._disk_get(key)
+            if encoded is None:
+                return None
+            self._remember(key, encoded)
+        return orjson.loads(encoded)
+
+    def set(self, key: str, result: Dict[str, Any]) -> None:
+        """Store a copy of result, evicting the least recently used entry if full."""
+        encoded = orjson.dumps(result)
+        self._remember(key, encoded)
+        self._disk_set(key, encoded)
+    
+    def get_or_compute(
+        self,
+        key: str,
+        compute: Callable[[], Dict[str, Any]],
+        cacheable: Callable[[Dict[str, Any]], bool] = lambda result: not result.get("error")
+    ) -> Dict[str, Any]:
+        """
+        Return the cached result for key, computing it at most once at a time.
+        
+        Concurrent callers with the same key (e.g. the same PR submitted twice
+        while its review is still running) wait for the first caller's result
+        instead of issuing a duplicate LLM request. Results rejected by
+        cacheable (by default, those carrying an "error") are shared with
+        waiters but not stored.
+        """
+        with self._lock:
+            encoded = self._lookup(key)
+            if encoded is not None:
+                return orjson.loads(encoded)
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = self._inflight[key] = Future()
+        
+        if not owner:
+            return orjson.loads(future.result())
+        
+        try:
+            encoded = self._disk_get(key)
+            if encoded is not None:
+                self._remember(key, encoded)
+                future.set_result(encoded)
+                return orjson.loads(encoded)
+            
+            result = compute()
+            encoded = orjson.dumps(result)
+            if cacheable(result):
+                self._remember(key, encoded)
+                self._disk_set(key, encoded)
+            future.set_result(encoded)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+
+@lru_cache(maxsize=1)
+def get_review_cache() -> ReviewCache:
+    """Return the cache shared by all agents; keys include the agent name so entries never collide."""
+    from src.config import get_settings
+    return ReviewCache(disk_dir=get_settings().REVIEW_CACHE_DIR or None)
@@ -1,13 +1,75 @@
 """Orchestrator agent that coordinates all review agents."""
 from typing import Dict, Any, List, Optional
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from itertools import chain
+import importlib
+import os
 import time
 
-from .security_agent import SecurityAgent
-from .logic_agent import LogicAgent
-from .performance_agent import PerformanceAgent
-from .readability_agent import ReadabilityAgent
-from .test_coverage_agent import TestCoverageAgent
+from src.services.github.diff_utils import should_skip_file, split_diff
+
+
+# Shared across reviews so threads are reused instead of spun up per request;
+# agents only wait on network I/O, so the pool can be wider than the CPU count
+_executor = ThreadPoolExecutor(max_workers=32, thread_name_prefix="review-agent")
+
+# Issue sort order, most severe first; unknown severities sort with "info"
+SEVERITY_RANK = {"critical": 0, "high": 1, "medium": 2, "low": 3, "info": 4}
+
+
+# Agent modules pull in LangChain, so they are imported when the registry is
+# first built rather than when this module is loaded
+_AGENT_CLASSES = {
+    "security": (".security_agent", "SecurityAgent"),
+    "logic": (".logic_agent", "LogicAgent"),
+    "performance": (".performance_agent", "PerformanceAgent"),
+    "readability": (".readability_agent", "ReadabilityAgent"),
+    "test_coverage": (".test_coverage_agent", "TestCoverageAgent"),
+}
+
+
+# Agents worth running on files of a given type when the caller does not pick
+# agents explicitly; any other extension (i.e. source code) gets every agent.
+# .txt is deliberately absent: requirements.txt and similar dependency
+# manifests need the security agent's dependency review.
+_AGENTS_BY_EXTENSION = {
+    ".md": {"readability"},
+    ".rst": {"readability"},
+    ".css": {"readability", "performance"},
+    ".scss": {"readability", "performance"},
+    ".less": {"readability", "performance"},
+    ".html": {"security", "readability"},
+    ".sql": {"security", "logic", "performance"},
+    ".json": {"security", "readability"},
+    ".yml": {"security", "readability"},
+    ".yaml": {"security", "readability"},
+    ".toml": {"security", "readability"},
+    ".ini": {"security", "readability"},
+}
+
+
+def _relevant_agents(pr_diff: str) -> Optional[set]:
+    """Return the agents relevant to the files in the diff, or None for all of them."""
+    relevant = set()
+    for path, _header, _hunks in split_diff(pr_diff):
+        if not path or should_skip_file(path):
+            continue
+        agents = _AGENTS_BY_EXTENSION.get(os.path.splitext(path)[1].lower())
+        if agents is None:
+            return None
+        relevant |= agents
+    return relevant or None
+
+
+@lru_cache(maxsize=1)
+def _agents() -> Dict[str, Any]:
+    """Build the agent registry once per process; agents hold no per-review state."""
+    agents = {}
+    for name, (module_name, class_name) in _AGENT_CLASSES.items():
+        module = importlib.import_module(module_name, __package__)
+        agents[name] = getattr(module, class_name)()
+    return agents
 
 
 class OrchestratorAgent:
@@ -18,19 +80,19 @@ class OrchestratorAgent:
     
     def __init__(self):
         """Initialize all specialized agents."""
-        self.agents = {
-            "security": SecurityAgent(),
-            "logic": LogicAgent(),
-            "performance": PerformanceAgent(),
-            "readability": ReadabilityAgent(),
-            "test_coverage": TestCoverageAgent()
-        }
+        from src.config import get_settings
+        from .batch_agent import MultiAgentBatchAnalyzer
+        
+        self.agents = _agents()
+        self.batch_analyzer = MultiAgentBatchAnalyzer(self.agents)
+        self.batch_agent_calls = get_settings().BATCH_AGENT_CALLS
     
     def review_pr(
         self, 
         pr_diff: str, 
         pr_info: Dict[str, Any],
-        selected_agents: Optional[List[str]] = None
+        selected_agents: Optional[List[str]] = None,
+        include_raw: bool = True
     ) -> Dict[str, Any]:
         """
         Orchestrate a complete PR review using multiple agents.
@@ -38,15 +100,27 @@ class OrchestratorAgent:
         Args:
             pr_diff: The git diff of the PR
             pr_info: Metadata about the PR (title, description, url, etc.)
-            selected_agents: List of agent names to run. If None, runs all agents.
+            selected_agents: List of agent names to run. If None, runs every
+                agent relevant to the changed file types.
+            include_raw: Keep each agent's own issue list in agent_results as
+                well as in the combined top-level issues. When False, each
+                agent result carries an issue_count instead.
             
         Returns:
             Dict containing aggregated review results from all agents
         """
         start_time = time.time()
         
-        # Determine which agents to run
-        agents_to_run = selected_agents if selected_agents else list(self.agents.keys())
+        # Determine which agents to run; by default skip agents with nothing
+        # to say about the changed file types (e.g. tests on a docs-only PR)
+        if selected_agents:
+            agents_to_run = selected_agents
+        else:
+            relevant = _relevant_agents(pr_diff)
+            agents_to_run = [
+                name for name in self.agents
+                if relevant is None or name in relevant
+            ]
         
         # Validate agent names
         invalid_agents = [a for a in agents_to_run if a not in self.agents]
@@ -60,38 +134,48 @@ class OrchestratorAgent:
         results = {}
         errors = {}
         
-        with ThreadPoolExecutor(max_workers=len(agents_to_run)) as executor:
-            # Submit all agent tasks
-            future_to_agent = {
-                executor.submit(
-                    self.agents[agent_name].analyze, 
-                    pr_diff, 
-                    pr_info
-                ): agent_name
-                for agent_name in agents_to_run
+        if self.batch_agent_calls and len(agents_to_run) > 1:
+            # One LLM request covering every selected agent
+            results = self.batch_analyzer.analyze(pr_diff, pr_info, agents_to_run)
+            errors = {
+                name: result["error"]
+                for name, result in results.items()
+                if result.get("error")
             }
-            
-            # Collect results as they complete
-            for future in as_completed(future_to_agent):
-                agent_name = future_to_agent[future]
-                try:
-                    result = future.result(timeout=60)  # 60 second timeout per agent
-                    results[agent_name] = result
-                except Exception as e:
-                    errors[agent_name] = str(e)
-                    results[agent_name] = {
-                        "agent": agent_name,
-                        "severity": "info",
-                        "issues": [],
-                        "summary": f"Agent failed: {str(e)}",
-                        "score": 0,
-                        "error": str(e)
-                    }
+            end_time = time.time()
+            return self._aggregate_results(results, pr_info, start_time, end_time, errors, include_raw)
+        
+        future_to_agent = {
+            _executor.submit(
+                self.agents[agent_name].analyze, 
+                pr_diff, 
+                pr_info
+            ): agent_name
+            for agent_name in agents_to_run
+        }
+        
+        # No deadline here: time spent queued for a worker or an LLM slot is
+        # not a failure, and each LLM request is bounded by its own timeout
+        # (LLM_REQUEST_TIMEOUT_SECONDS), reported by the agent as a failed analysis
+        for future, agent_name in future_to_agent.items():
+            try:
+                results[agent_name] = future.result()
+            except Exception as e:
+                message = str(e)
+                errors[agent_name] = message
+                results[agent_name] = {
+                    "agent": agent_name,
+                    "severity": "info",
+                    "issues": [],
+                    "summary": f"Agent failed: {message}",
+                    "score": 0,
+                    "error": message
+                }
         
         # Aggregate results
         end_time = time.time()
         
-        return self._aggregate_results(results, pr_info, start_time, end_time, errors)
+        return self._aggregate_results(results, pr_info, start_time, end_time, errors, include_raw)
     
     def _aggregate_results(
         self, 
@@ -99,7 +183,8 @@ class OrchestratorAgent:
         pr_info: Dict[str, Any],
         start_time: float,
         end_time: float,
-        errors: Dict[str, str]
+        errors: Dict[str, str],
+        include_raw: bool = True
     ) -> Dict[str, Any]:
         """
         Aggregate all agent results into a comprehensive report.
@@ -110,27 +195,36 @@ class OrchestratorAgent:
             start_time: Review start timestamp
             end_time: Review end timestamp
             errors: Any errors that occurred during review
+            include_raw: Keep per-agent issue lists in agent_results
             
         Returns:
             Comprehensive review report
         """
-        # Collect all issues across agents
-        all_issues = []
+        # Collect all issues across agents into per-severity buckets, which
+        # orders them by severity (stably, in agent order) without a sort
+        buckets: List[List[Dict[str, Any]]] = [[] for _ in range(len(SEVERITY_RANK))]
+        severity_counts = {"critical": 0, "high": 0, "medium": 0, "low": 0, "info": 0}
         for agent_name, result in results.items():
             issues = result.get("issues", [])
             for issue in issues:
                 issue["agent"] = agent_name
-                all_issues.append(issue)
-        
-        # Sort issues by severity
-        severity_order = {"critical": 0, "high": 1, "medium": 2, "low": 3, "info": 4}
-        all_issues.sort(key=lambda x: severity_order.get(x.get("severity", "info"), 4))
+                severity = issue.get("severity", "info")
+                buckets[SEVERITY_RANK.get(severity, 4)].append(issue)
+                severity_counts[severity] = severity_counts.get(severity, 0) + 1
+        all_issues = list(chain.from_iterable(buckets))
         
-        # Count issues by severity
-        severity_counts = {"critical": 0, "high": 0, "medium": 0, "low": 0, "info": 0}
-        for issue in all_issues:
-            severity = issue.get("severity", "info")
-            severity_counts[severity] = severity_counts.get(severity, 0) + 1
+        # Every issue is already in all_issues (tagged with its agent), so
+        # callers can opt out of the second copy and get counts instead
+        if include_raw:
+            agent_results = results
+        else:
+            agent_results = {
+                agent_name: {
+                    **{key: value for key, value in result.items() if key != "issues"},
+                    "issue_count": len(result.get("issues", []))
+                }
+                for agent_name, result in results.items()
+            }
         
         # Calculate overall score (weighted average)
         scores = [result.get("score", 0) for result in results.values() if result.get("score")]
@@ -161,7 +255,7 @@ class OrchestratorAgent:
                 "agents_run": list(results.keys()),
                 "review_time_seconds": round(end_time - start_time, 2)
             },
-            "agent_results": results,
+            "agent_results": agent_results,
             "issues": all_issues,
             "errors": errors if errors else None,
             "timestamp": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(end_time))
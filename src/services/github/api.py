@@ -1,73 +1,389 @@
+import asyncio
+import hashlib
+import hmac
 import httpx
+import io
+import logging
+import re
+import threading
+import time
+import orjson
+from collections import OrderedDict
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+from functools import lru_cache
+from itertools import islice
 from github import Github
-from typing import List, Dict, Any, Optional
-from src.config import settings
+from github.Repository import Repository
+from typing import List, Dict, Any, Optional, Set, Tuple
+from src.config import get_settings
+from src.services.github.diff_utils import should_skip_file, split_diff
+
+
+logger = logging.getLogger(__name__)
+
+GITHUB_API_URL = "https://api.github.com"
+
+# Responses kept for ETag revalidation; a 304 costs no rate limit. Bounded by
+# entry count and by total body size, since file contents are cached too;
+# a body over ETAG_CACHE_MAX_BODY_BYTES is not cached at all
+ETAG_CACHE_SIZE = 512
+ETAG_CACHE_MAX_BYTES = 32 * 1024 * 1024
+ETAG_CACHE_MAX_BODY_BYTES = 2 * 1024 * 1024
+
+# PR metadata is served from cache for a minute, then for up to five more
+# minutes while it is refreshed in the background
+PR_DETAILS_MAX_AGE = 60.0
+PR_DETAILS_STALE_WHILE_REVALIDATE = 240.0
+
+# Whole-PR unified diff; GitHub answers 406 when it is too large to render
+DIFF_MEDIA_TYPE = "application/vnd.github.v3.diff"
+
+# Content at a full commit SHA never changes, so it needs no revalidation
+COMMIT_SHA_RE = re.compile(r'[0-9a-f]{40}')
+
+# Lazy PyGithub repository handles kept per service (LRU); owner/repo come
+# from request input, so the cache must not grow without bound
+REPO_CACHE_SIZE = 128
+
+# Decoded files kept per service for code-context lookups (LRU)
+FILE_TEXT_CACHE_SIZE = 64
+
+# Line comments posted in parallel; kept low to stay clear of GitHub's
+# secondary rate limits on content creation
+COMMENT_POST_CONCURRENCY = 4
+
+# Retries for rate-limited requests, and the longest single wait honored
+RATE_LIMIT_RETRIES = 5
+RATE_LIMIT_MAX_WAIT = 60.0
+
+# Keep-alive pool size for both clients, sized for the concurrent fetch and
+# enrichment threads so requests reuse TLS connections instead of reconnecting
+GITHUB_POOL_SIZE = 20
+
+
+def _retry_after_seconds(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header given in seconds or as an HTTP date; None if absent or invalid."""
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        return parsedate_to_datetime(value).timestamp() - time.time()
+    except (TypeError, ValueError):
+        return None
+
+
+def _isoformat(timestamp: str) -> str:
+    """Convert a REST timestamp ("...Z") to the datetime.isoformat() form ("...+00:00") PyGithub returns."""
+    return datetime.fromisoformat(timestamp.replace("Z", "+00:00")).isoformat()
 
 
 class GitHubService:
     """Service for interacting with GitHub API"""
     
     def __init__(self):
-        self.github = Github(settings.GITHUB_TOKEN)
+        settings = get_settings()
+        # 100 items per page (the maximum) instead of 30 cuts paginated
+        # file listings to a third of the requests
+        self.github = Github(settings.GITHUB_TOKEN, per_page=100, pool_size=GITHUB_POOL_SIZE)
         self.headers = {
             "Authorization": f"token {settings.GITHUB_TOKEN}",
             "Accept": "application/vnd.github.v3+json"
         }
+        self._webhook_secret = settings.GITHUB_WEBHOOK_SECRET.encode()
+        self._http: Optional[httpx.AsyncClient] = None
+        self._background_tasks: Set[asyncio.Task] = set()
+        self._etag_cache: "OrderedDict[Tuple[Any, ...], Tuple[str, bytes, float]]" = OrderedDict()
+        self._etag_cache_bytes = 0
+        self._refreshing: Set[Tuple[Any, ...]] = set()
+        self._repo_cache: "OrderedDict[Tuple[str, str], Repository]" = OrderedDict()
+        self._repo_lock = threading.Lock()
+        # Enrichment reads files from several threads at once
+        self._file_text_cache: "OrderedDict[Tuple[str, str, str, str], str]" = OrderedDict()
+        self._file_text_lock = threading.Lock()
+    
+    @property
+    def http(self) -> httpx.AsyncClient:
+        """Shared async client for the REST read paths, created on first use."""
+        if self._http is None:
+            self._http = httpx.AsyncClient(
+                base_url=GITHUB_API_URL,
+                headers=self.headers,
+                timeout=30.0,
+                limits=httpx.Limits(
+                    max_connections=100,
+                    max_keepalive_connections=GITHUB_POOL_SIZE
+                )
+            )
+        return self._http
+    
+    async def aclose(self) -> None:
+        """Close the async HTTP client's connection pool."""
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+    
+    async def _request(self, method: str, url: str, **kwargs: Any) -> httpx.Response:
+        """
+        Send a REST request, waiting out GitHub rate limits before retrying.
+        
+        Primary (X-RateLimit-Remaining: 0) and secondary (403/429 with
+        Retry-After) limits are retried up to RATE_LIMIT_RETRIES times,
+        sleeping for what GitHub asks or backing off exponentially from 1s.
+        When GitHub asks for more than RATE_LIMIT_MAX_WAIT, the limited
+        response is returned at once rather than stalling the caller.
+        """
+        for attempt in range(RATE_LIMIT_RETRIES + 1):
+            response = await self.http.request(method, url, **kwargs)
+            if response.status_code not in (403, 429) or attempt == RATE_LIMIT_RETRIES:
+                return response
+            
+            retry_after = _retry_after_seconds(response.headers.get("Retry-After"))
+            if retry_after is not None:
+                delay = retry_after
+            elif response.headers.get("X-RateLimit-Remaining") == "0":
+                reset_at = float(response.headers.get("X-RateLimit-Reset", 0))
+                delay = reset_at - time.time()
+            elif response.status_code == 429:
+                delay = 2 ** attempt
+            else:
+                # A plain 403 is a permissions error, not a rate limit
+                return response
+            
+            if delay > RATE_LIMIT_MAX_WAIT:
+                logger.warning("GitHub rate limit on %s %s resets in %.0fs; not waiting", method, url, delay)
+                return response
+            delay = max(delay, 1.0)
+            logger.warning("GitHub rate limit hit on %s %s; retrying in %.0fs", method, url, delay)
+            await asyncio.sleep(delay)
+        return response
     
-    async def get_pr_details(self, owner: str, repo: str, pr_number: int) -> Dict[str, Any]:
-        """Fetch PR details including metadata"""
+    async def _get_revalidated(
+        self,
+        path: str,
+        params: Optional[Dict[str, Any]] = None,
+        accept: Optional[str] = None,
+        immutable: bool = False,
+        max_age: float = 0,
+        stale_while_revalidate: float = 0
+    ) -> bytes:
+        """
+        GET a REST resource, revalidating any cached copy with If-None-Match.
+        
+        Resources marked immutable (addressed by commit SHA) are served from
+        the cache without a request at all. Otherwise a cached copy younger
+        than max_age is served as is, and one within a further
+        stale_while_revalidate seconds is served while a background request
+        refreshes it.
+        """
+        key = (path, tuple(sorted((params or {}).items())), accept)
+        cached = self._etag_cache.get(key)
+        if cached:
+            self._etag_cache.move_to_end(key)
+            age = time.monotonic() - cached[2]
+            if immutable or age < max_age:
+                return cached[1]
+            if age < max_age + stale_while_revalidate:
+                if key not in self._refreshing:
+                    self._refreshing.add(key)
+                    task = asyncio.create_task(self._refresh_cached(key, path, params, accept))
+                    self._background_tasks.add(task)
+                    task.add_done_callback(self._background_tasks.discard)
+                return cached[1]
+        
+        return await self._fetch_revalidated(key, path, params, accept)
+    
+    async def _fetch_revalidated(
+        self,
+        key: Tuple[Any, ...],
+        path: str,
+        params: Optional[Dict[str, Any]],
+        accept: Optional[str]
+    ) -> bytes:
+        """Send the conditional GET for a cache key and store the response."""
+        headers = {"Accept": accept} if accept else {}
+        cached = self._etag_cache.get(key)
+        if cached:
+            headers["If-None-Match"] = cached[0]
+        
+        response = await self._request("GET", path, params=params, headers=headers)
+        if response.status_code == 304 and cached:
+            self._store_response(key, cached[0], cached[1])
+            return cached[1]
+        response.raise_for_status()
+        
+        etag = response.headers.get("ETag")
+        if etag:
+            self._store_response(key, etag, response.content)
+        return response.content
+    
+    def _store_response(self, key: Tuple[Any, ...], etag: str, body: bytes) -> None:
+        """Cache a response body under key, stamped now, evicting the oldest while over either limit."""
+        previous = self._etag_cache.pop(key, None)
+        if previous is not None:
+            self._etag_cache_bytes -= len(previous[1])
+        if len(body) > ETAG_CACHE_MAX_BODY_BYTES:
+            return
+        
+        self._etag_cache[key] = (etag, body, time.monotonic())
+        self._etag_cache_bytes += len(body)
+        while len(self._etag_cache) > ETAG_CACHE_SIZE or self._etag_cache_bytes > ETAG_CACHE_MAX_BYTES:
+            _key, (_etag, evicted, _fetched_at) = self._etag_cache.popitem(last=False)
+            self._etag_cache_bytes -= len(evicted)
+    
+    async def _refresh_cached(
+        self,
+        key: Tuple[Any, ...],
+        path: str,
+        params: Optional[Dict[str, Any]],
+        accept: Optional[str]
+    ) -> None:
+        """Revalidate a stale cache entry in the background, logging any failure."""
         try:
-            repo_obj = self.github.get_repo(f"{owner}/{repo}")
-            pr = repo_obj.get_pull(pr_number)
+            await self._fetch_revalidated(key, path, params, accept)
+        except Exception as e:
+            logger.warning("Error refreshing %s: %s", path, e)
+        finally:
+            self._refreshing.discard(key)
+    
+    async def get_pr_details(
+        self,
+        owner: str,
+        repo: str,
+        pr_number: int,
+        revalidate: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Fetch PR details including metadata
+        
+        By default the details may be served up to a few minutes stale. Pass
+        revalidate=True when head_sha must be current, e.g. to post a review
+        against it; an unchanged PR then costs a 304.
+        """
+        try:
+            pr = orjson.loads(
+                await self._get_revalidated(
+                    f"/repos/{owner}/{repo}/pulls/{pr_number}",
+                    max_age=0 if revalidate else PR_DETAILS_MAX_AGE,
+                    stale_while_revalidate=0 if revalidate else PR_DETAILS_STALE_WHILE_REVALIDATE
+                )
+            )
             
             return {
-                "number": pr.number,
-                "title": pr.title,
-                "description": pr.body or "",
-                "author": pr.user.login,
-                "state": pr.state,
-                "created_at": pr.created_at.isoformat(),
-                "updated_at": pr.updated_at.isoformat(),
-                "head_sha": pr.head.sha,
-                "base_branch": pr.base.ref,
-                "head_branch": pr.head.ref,
-                "commits": pr.commits,
-                "additions": pr.additions,
-                "deletions": pr.deletions,
-                "changed_files": pr.changed_files
+                "number": pr["number"],
+                "title": pr["title"],
+                "description": pr["body"] or "",
+                "author": pr["user"]["login"],
+                "state": pr["state"],
+                "created_at": _isoformat(pr["created_at"]),
+                "updated_at": _isoformat(pr["updated_at"]),
+                "head_sha": pr["head"]["sha"],
+                "base_branch": pr["base"]["ref"],
+                "head_branch": pr["head"]["ref"],
+                "commits": pr["commits"],
+                "additions": pr["additions"],
+                "deletions": pr["deletions"],
+                "changed_files": pr["changed_files"]
             }
         except Exception as e:
             raise Exception(f"Failed to fetch PR details: {str(e)}")
     
     async def get_pr_diff(self, owner: str, repo: str, pr_number: int) -> List[Dict[str, Any]]:
-        """Fetch PR diff with file changes"""
+        """
+        Fetch PR diff with file changes
+        
+        The whole diff comes back in one (ETag-revalidated) response and is
+        split per file locally; the paginated file listing is only used when
+        GitHub declines to render a diff that large.
+        """
         try:
-            repo_obj = self.github.get_repo(f"{owner}/{repo}")
-            pr = repo_obj.get_pull(pr_number)
+            path = f"/repos/{owner}/{repo}/pulls/{pr_number}"
+            try:
+                diff = await self._get_revalidated(path, accept=DIFF_MEDIA_TYPE)
+            except httpx.HTTPStatusError as e:
+                if e.response.status_code not in (406, 422):
+                    raise
+                return await self._list_pr_files(owner, repo, pr_number)
+            
+            # Revalidated rather than served stale like get_pr_details, so the
+            # file URLs point at the commit the diff was taken from; an
+            # unchanged PR costs a 304, which is not rate limited
+            pr = orjson.loads(await self._get_revalidated(path))
+            head_sha = pr["head"]["sha"]
             
             files_data = []
-            for file in pr.get_files():
+            for filename, header, hunks in split_diff(diff.decode("utf-8", errors="replace")):
+                if not filename:
+                    continue
+                changed = [line[:1] for hunk in hunks for line in hunk.split("\n")[1:]]
+                additions = changed.count("+")
+                deletions = changed.count("-")
                 files_data.append({
-                    "filename": file.filename,
-                    "status": file.status,
-                    "additions": file.additions,
-                    "deletions": file.deletions,
-                    "changes": file.changes,
-                    "patch": file.patch if hasattr(file, 'patch') else None,
-                    "raw_url": file.raw_url,
-                    "blob_url": file.blob_url
+                    "filename": filename,
+                    "status": self._diff_file_status(header),
+                    "additions": additions,
+                    "deletions": deletions,
+                    "changes": additions + deletions,
+                    "patch": "\n".join(hunks).rstrip("\n") if hunks else None,
+                    "raw_url": f"https://github.com/{owner}/{repo}/raw/{head_sha}/{filename}",
+                    "blob_url": f"https://github.com/{owner}/{repo}/blob/{head_sha}/{filename}"
                 })
             
             return files_data
         except Exception as e:
             raise Exception(f"Failed to fetch PR diff: {str(e)}")
     
+    @staticmethod
+    def _diff_file_status(header: List[str]) -> str:
+        """Map a file section's git header to the files API status."""
+        for line in header:
+            if line.startswith("new file mode"):
+                return "added"
+            if line.startswith("deleted file mode"):
+                return "removed"
+            if line.startswith("rename from"):
+                return "renamed"
+        return "modified"
+    
+    async def _list_pr_files(self, owner: str, repo: str, pr_number: int) -> List[Dict[str, Any]]:
+        """List a PR's changed files through the paginated files API."""
+        files_data = []
+        url = f"/repos/{owner}/{repo}/pulls/{pr_number}/files"
+        params: Optional[Dict[str, Any]] = {"per_page": 100}
+        
+        # Follow the Link header through every page of the file listing
+        while url:
+            response = await self._request("GET", url, params=params)
+            response.raise_for_status()
+            for file in response.json():
+                files_data.append({
+                    "filename": file["filename"],
+                    "status": file["status"],
+                    "additions": file["additions"],
+                    "deletions": file["deletions"],
+                    "changes": file["changes"],
+                    "patch": file.get("patch"),
+                    "raw_url": file["raw_url"],
+                    "blob_url": file["blob_url"]
+                })
+            url = response.links.get("next", {}).get("url")
+            params = None  # The next link already carries the query string
+        
+        return files_data
+    
     async def get_file_content(self, owner: str, repo: str, file_path: str, ref: str) -> str:
         """Get full file content at specific commit"""
         try:
-            repo_obj = self.github.get_repo(f"{owner}/{repo}")
-            content = repo_obj.get_contents(file_path, ref=ref)
-            return content.decoded_content.decode('utf-8')
+            content = await self._get_revalidated(
+                f"/repos/{owner}/{repo}/contents/{file_path}",
+                params={"ref": ref},
+                accept="application/vnd.github.raw",
+                immutable=COMMIT_SHA_RE.fullmatch(ref) is not None
+            )
+            return content.decode('utf-8')
         except Exception as e:
             return f"Could not fetch file content: {str(e)}"
     
@@ -76,13 +392,20 @@ class GitHubService:
         owner: str,
         repo: str,
         pr_number: int,
-        comments: List[Dict[str, Any]]
+        comments: List[Dict[str, Any]],
+        head_sha: Optional[str] = None
     ) -> Dict[str, Any]:
-        """Post review comments to PR with improved error handling"""
+        """
+        Post review comments to PR with improved error handling
+        
+        Line comments and the merged general comments are submitted as a single
+        review. If GitHub rejects it (a line outside the diff), line comments
+        are posted individually and the summary as a PR comment.
+        Line comments are attached to head_sha; pass it when the caller already
+        has a current one (from get_pr_details(..., revalidate=True), not a
+        possibly stale cached read) to skip looking the PR up again.
+        """
         try:
-            repo_obj = self.github.get_repo(f"{owner}/{repo}")
-            pr = repo_obj.get_pull(pr_number)
-            
             # Separate line-specific and general comments
             line_comments = []
             general_comments = []
@@ -96,32 +419,74 @@ class GitHubService:
             posted_count = 0
             failed_count = 0
             
-            # Post line-specific comments
+            bodies = [gc["body"] for gc in general_comments if gc.get("body")]
+            summary = "\n\n".join(bodies)
+            
             if line_comments:
-                commit = pr.get_commits()[pr.commits - 1]
+                commit_id = head_sha
+                if not commit_id:
+                    pr = orjson.loads(
+                        await self._get_revalidated(f"/repos/{owner}/{repo}/pulls/{pr_number}")
+                    )
+                    commit_id = pr["head"]["sha"]
+                
+                # One review carries every line comment and the summary
+                response = await self._request(
+                    "POST",
+                    f"/repos/{owner}/{repo}/pulls/{pr_number}/reviews",
+                    json={
+                        "commit_id": commit_id,
+                        # GitHub rejects a COMMENT review with an empty body
+                        "body": f"## AI Code Review\n\n{summary}" if summary else "## AI Code Review",
+                        "event": "COMMENT",
+                        "comments": [
+                            {"path": lc["path"], "line": lc["line"], "side": "RIGHT", "body": lc["body"]}
+                            for lc in line_comments
+                        ]
+                    }
+                )
+                if response.status_code != 422:
+                    response.raise_for_status()
+                    return {
+                        "status": "success",
+                        "comments_posted": len(line_comments) + len(bodies),
+                        "comments_failed": 0
+                    }
+                
+                # GitHub rejects the whole review if any line is outside the
+                # diff; post comments one by one so the valid ones still land
+                logger.warning("Review rejected, posting comments individually: %s", response.text)
+                semaphore = asyncio.Semaphore(COMMENT_POST_CONCURRENCY)
                 
-                for lc in line_comments:
-                    try:
-                        pr.create_review_comment(
-                            body=lc["body"],
-                            commit=commit,
-                            path=lc["path"],
-                            line=lc["line"]
+                async def post_line_comment(lc: Dict[str, Any]) -> None:
+                    async with semaphore:
+                        response = await self._request(
+                            "POST",
+                            f"/repos/{owner}/{repo}/pulls/{pr_number}/comments",
+                            json={
+                                "body": lc["body"],
+                                "commit_id": commit_id,
+                                "path": lc["path"],
+                                "line": lc["line"]
+                            }
                         )
-                        posted_count += 1
-                    except Exception as e:
+                        response.raise_for_status()
+                
+                outcomes = await asyncio.gather(
+                    *(post_line_comment(lc) for lc in line_comments),
+                    return_exceptions=True
+                )
+                for lc, outcome in zip(line_comments, outcomes):
+                    if isinstance(outcome, Exception):
                         failed_count += 1
-                        print(f"Failed to post comment on {lc['path']}:{lc['line']}: {str(e)}")
+                        logger.warning("Failed to post comment on %s:%s: %s", lc["path"], lc["line"], outcome)
+                    else:
+                        posted_count += 1
             
-            # Post general review comment
-            if general_comments:
-                summary_parts = []
-                for gc in general_comments:
-                    summary_parts.append(gc.get("body", ""))
-                
-                summary = "\n\n".join(summary_parts)
-                pr.create_issue_comment(f"## AI Code Review\n\n{summary}")
-                posted_count += len(general_comments)
+            # Post general comments as one review comment, skipping empty bodies
+            if summary:
+                await self.post_general_comment(owner, repo, pr_number, f"## AI Code Review\n\n{summary}")
+                posted_count += len(bodies)
             
             return {
                 "status": "success",
@@ -137,26 +502,74 @@ class GitHubService:
         owner: str,
         repo: str,
         pr_number: int,
-        body: str
+        body: str,
+        wait: bool = True
     ) -> Dict[str, Any]:
-        """Post a general comment to PR"""
+        """
+        Post a general comment to PR.
+        
+        With wait=False the comment is posted in the background and the call
+        returns immediately with status "pending"; failures are logged.
+        """
+        if not wait:
+            task = asyncio.create_task(self._post_general_comment_logged(owner, repo, pr_number, body))
+            self._background_tasks.add(task)
+            task.add_done_callback(self._background_tasks.discard)
+            return {"status": "pending"}
+        
         try:
-            repo_obj = self.github.get_repo(f"{owner}/{repo}")
-            pr = repo_obj.get_pull(pr_number)
-            comment = pr.create_issue_comment(body)
+            # PR conversation comments are issue comments: one POST, no need
+            # to look up the repository and pull request objects first
+            response = await self._request(
+                "POST",
+                f"/repos/{owner}/{repo}/issues/{pr_number}/comments",
+                json={"body": body}
+            )
+            response.raise_for_status()
+            comment = response.json()
             
             return {
                 "status": "success",
-                "comment_id": comment.id,
-                "comment_url": comment.html_url
+                "comment_id": comment["id"],
+                "comment_url": comment["html_url"]
             }
         except Exception as e:
             raise Exception(f"Failed to post general comment: {str(e)}")
     
+    async def _post_general_comment_logged(self, owner: str, repo: str, pr_number: int, body: str) -> None:
+        """Post a general comment from a background task, logging any failure."""
+        try:
+            await self.post_general_comment(owner, repo, pr_number, body)
+        except Exception as e:
+            logger.warning("Error posting background comment: %s", e)
+    
+    async def flush_background_tasks(self) -> None:
+        """Wait for background work (comments posted with wait=False, cache refreshes) to finish."""
+        if self._background_tasks:
+            await asyncio.gather(*self._background_tasks, return_exceptions=True)
+    
+    def _repo(self, owner: str, repo: str) -> Repository:
+        """
+        Return the PyGithub handle for a repository, reused across calls.
+        
+        Handles are lazy: the sync helpers only call methods on them, which
+        build their own URLs, so the repository itself is never fetched.
+        The REPO_CACHE_SIZE most recently used handles are kept.
+        """
+        key = (owner, repo)
+        with self._repo_lock:
+            repo_obj = self._repo_cache.get(key)
+            if repo_obj is None:
+                repo_obj = self._repo_cache[key] = self.github.get_repo(f"{owner}/{repo}", lazy=True)
+            self._repo_cache.move_to_end(key)
+            while len(self._repo_cache) > REPO_CACHE_SIZE:
+                self._repo_cache.popitem(last=False)
+        return repo_obj
+    
     def get_pull_request(self, owner: str, repo: str, pr_number: int) -> Optional[Dict[str, Any]]:
         """Get PR information synchronously."""
         try:
-            repo_obj = self.github.get_repo(f"{owner}/{repo}")
+            repo_obj = self._repo(owner, repo)
             pr = repo_obj.get_pull(pr_number)
             
             return {
@@ -173,28 +586,55 @@ class GitHubService:
                 "head_sha": pr.head.sha
             }
         except Exception as e:
-            print(f"Error fetching PR: {e}")
+            logger.warning("Error fetching PR: %s", e)
             return None
     
     def get_pull_request_diff(self, owner: str, repo: str, pr_number: int) -> Optional[str]:
         """Get PR diff as a single string."""
         try:
-            repo_obj = self.github.get_repo(f"{owner}/{repo}")
+            repo_obj = self._repo(owner, repo)
             pr = repo_obj.get_pull(pr_number)
             
-            diff_parts = []
-            for file in pr.get_files():
-                if file.patch:
-                    diff_parts.append(f"--- a/{file.filename}")
-                    diff_parts.append(f"+++ b/{file.filename}")
-                    diff_parts.append(file.patch)
-                    diff_parts.append("")
-            
-            return "\n".join(diff_parts)
+            # Files are filtered as the paginated listing is consumed: binary
+            # files and pure renames have no patch, and deleted files leave
+            # nothing behind to review
+            return "\n".join(
+                f"--- a/{file.filename}\n+++ b/{file.filename}\n{file.patch}\n"
+                for file in pr.get_files()
+                if file.patch
+                and file.status != "removed"
+                and not should_skip_file(file.filename)
+            )
         except Exception as e:
-            print(f"Error fetching PR diff: {e}")
+            logger.warning("Error fetching PR diff: %s", e)
             return None
     
+    def _get_file_text(self, owner: str, repo: str, file_path: str, ref: str) -> str:
+        """
+        Fetch and decode a file at ref.
+        
+        Cached because issues cluster in the same files; callers pass the
+        PR's head SHA, so entries never go stale. The cache is per instance
+        and keeps the FILE_TEXT_CACHE_SIZE most recently used files.
+        """
+        key = (owner, repo, file_path, ref)
+        with self._file_text_lock:
+            text = self._file_text_cache.get(key)
+            if text is not None:
+                self._file_text_cache.move_to_end(key)
+                return text
+        
+        repo_obj = self._repo(owner, repo)
+        content = repo_obj.get_contents(file_path, ref=ref)
+        text = content.decoded_content.decode('utf-8')
+        
+        with self._file_text_lock:
+            self._file_text_cache[key] = text
+            self._file_text_cache.move_to_end(key)
+            while len(self._file_text_cache) > FILE_TEXT_CACHE_SIZE:
+                self._file_text_cache.popitem(last=False)
+        return text
+    
     def get_file_lines_with_context(
         self, 
         owner: str, 
@@ -219,20 +659,21 @@ class GitHubService:
             Dict with line content, start/end line numbers, and full context
         """
         try:
-            repo_obj = self.github.get_repo(f"{owner}/{repo}")
-            content = repo_obj.get_contents(file_path, ref=ref)
-            file_content = content.decoded_content.decode('utf-8')
-            
-            lines = file_content.split('\n')
-            total_lines = len(lines)
+            file_content = self._get_file_text(owner, repo, file_path, ref)
             
             # Calculate range (0-indexed internally)
             start_idx = max(0, line_number - 1 - context_lines)
-            end_idx = min(total_lines, line_number + context_lines)
+            
+            # Read only up to the end of the window instead of splitting the
+            # whole file; lines keep their "\n", so strip it afterwards
+            window = islice(io.StringIO(file_content), start_idx, line_number + context_lines)
+            context_lines_list = [line.rstrip('\n') for line in window]
+            end_idx = start_idx + len(context_lines_list)
             
             # Get the specific line and context
-            target_line = lines[line_number - 1] if 0 <= line_number - 1 < total_lines else ""
-            context_lines_list = lines[start_idx:end_idx]
+            target_idx = line_number - 1 - start_idx
+            in_window = line_number >= 1 and 0 <= target_idx < len(context_lines_list)
+            target_line = context_lines_list[target_idx] if in_window else ""
             
             return {
                 "file_path": file_path,
@@ -244,7 +685,7 @@ class GitHubService:
                 "full_context": '\n'.join(context_lines_list)
             }
         except Exception as e:
-            print(f"Error fetching file content: {e}")
+            logger.warning("Error fetching file content: %s", e)
             return None
     
     def get_pr_file_patches(self, owner: str, repo: str, pr_number: int) -> Dict[str, str]:
@@ -255,7 +696,7 @@ class GitHubService:
             Dict mapping file paths to their patch content
         """
         try:
-            repo_obj = self.github.get_repo(f"{owner}/{repo}")
+            repo_obj = self._repo(owner, repo)
             pr = repo_obj.get_pull(pr_number)
             
             patches = {}
@@ -265,26 +706,33 @@ class GitHubService:
             
             return patches
         except Exception as e:
-            print(f"Error fetching file patches: {e}")
+            logger.warning("Error fetching file patches: %s", e)
             return {}
 
     
     def verify_webhook_signature(self, payload: bytes, signature: str) -> bool:
         """Verify GitHub webhook signature"""
-        import hmac
-        import hashlib
-        
-        if not settings.GITHUB_WEBHOOK_SECRET:
+        if not self._webhook_secret:
             return True  # Skip verification if no secret is set
         
-        mac = hmac.new(
-            settings.GITHUB_WEBHOOK_SECRET.encode(),
-            msg=payload,
-            digestmod=hashlib.sha256
-        )
-        expected_signature = f"sha256={mac.hexdigest()}"
-        return hmac.compare_digest(expected_signature, signature)
+        if not signature.startswith("sha256="):
+            return False
+        
+        try:
+            provided = bytes.fromhex(signature.removeprefix("sha256="))
+        except ValueError:
+            return False
+        
+        # One-shot HMAC over the payload, compared as raw digest bytes
+        expected = hmac.digest(self._webhook_secret, payload, hashlib.sha256)
+        return hmac.compare_digest(expected, provided)
 
 
 # Alias for convenience
 GitHubAPI = GitHubService
+
+
+@lru_cache(maxsize=1)
+def get_github_service() -> GitHubService:
+    """Get the shared GitHubService (one authenticated client per process)."""
+    return GitHubService()
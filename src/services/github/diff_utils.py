@@ -0,0 +1,217 @@
+"""Helpers for filtering and budgeting unified diffs before review."""
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+
+# Generated files that only cost prompt tokens: lockfiles, minified
+# bundles, source maps and vendored dependencies
+_SKIP_FILENAMES = frozenset({
+    "package-lock.json",
+    "yarn.lock",
+    "pnpm-lock.yaml",
+    "poetry.lock",
+    "pipfile.lock",
+    "cargo.lock",
+    "composer.lock",
+    "go.sum",
+})
+_SKIP_SUFFIXES = (".min.js", ".min.css", ".map")
+
+
+def should_skip_file(filename: str) -> bool:
+    """Return True for files that should not be sent to the review agents."""
+    path = filename.lower()
+    return (
+        path.rsplit("/", 1)[-1] in _SKIP_FILENAMES
+        or path.endswith(_SKIP_SUFFIXES)
+        or path.startswith("node_modules/")
+        or "/node_modules/" in path
+    )
+
+
+def _hunk_has_changes(hunk: str) -> bool:
+    """Return True if a hunk (starting with its "@@" line) adds or removes a line."""
+    return any(line.startswith(("+", "-")) for line in hunk.split("\n")[1:])
+
+
+def has_changes(diff: str) -> bool:
+    """
+    Return True if the diff adds or removes at least one line.
+    
+    Lines are classified by position: "---" / "+++" are file headers only
+    before a file's first "@@", so a removed "-- comment" line still counts.
+    """
+    return any(
+        _hunk_has_changes(hunk)
+        for _path, _header, hunks in split_diff(diff)
+        for hunk in hunks
+    )
+
+
+def is_unchanged_diff(diff: str) -> bool:
+    """
+    Return True if diff is blank, or is a unified diff that adds or removes no lines.
+    
+    Text that does not parse as a unified diff (e.g. pasted code) is not
+    considered unchanged, so it is still sent for review.
+    """
+    if not diff.strip():
+        return True
+    sections = split_diff(diff)
+    return any(path for path, _header, _hunks in sections) and not any(
+        _hunk_has_changes(hunk)
+        for _path, _header, hunks in sections
+        for hunk in hunks
+    )
+
+
+def _is_bare_file_start(lines: List[str], i: int) -> bool:
+    """Check for a "--- a/x" / "+++ b/x" / "@@" header without "diff --git"."""
+    return (
+        lines[i].startswith("--- ")
+        and i + 2 < len(lines)
+        and lines[i + 1].startswith("+++ ")
+        and lines[i + 2].startswith("@@")
+    )
+
+
+def _file_path(header: List[str]) -> Optional[str]:
+    """Extract the file path from a file section's header lines."""
+    old_path = None
+    git_path = None
+    for line in header:
+        if line.startswith("+++ ") and line[4:] != "/dev/null":
+            return line[4:].removeprefix("b/")
+        if line.startswith("--- ") and line[4:] != "/dev/null":
+            old_path = line[4:].removeprefix("a/")
+        elif line.startswith("rename to "):
+            git_path = line[10:]
+        elif line.startswith("diff --git ") and git_path is None:
+            # Binary files and pure renames have no "---" / "+++" lines
+            git_path = line.split(" b/", 1)[-1]
+    return old_path or git_path
+
+
+def split_diff(diff: str) -> List[Tuple[Optional[str], List[str], List[str]]]:
+    """
+    Split a unified diff into per-file sections.
+    
+    Handles both git output ("diff --git" headers) and the bare
+    "--- a/x" / "+++ b/x" form built by GitHubService.get_pull_request_diff.
+    
+    Returns:
+        List of (path, header_lines, hunks) where each hunk is the text of one
+        "@@" block including its header line
+    """
+    lines = diff.split("\n")
+    sections = []
+    header: List[str] = []
+    hunks: List[List[str]] = []
+    
+    for i, line in enumerate(lines):
+        if line.startswith("diff --git ") or (hunks and _is_bare_file_start(lines, i)):
+            if header or hunks:
+                sections.append((_file_path(header), header, ["\n".join(h) for h in hunks]))
+            header, hunks = [], []
+        
+        if line.startswith("@@"):
+            hunks.append([line])
+        elif hunks:
+            hunks[-1].append(line)
+        else:
+            header.append(line)
+    
+    if header or hunks:
+        sections.append((_file_path(header), header, ["\n".join(h) for h in hunks]))
+    return sections
+
+
+def file_patches(diff: str) -> Dict[str, str]:
+    """
+    Map each file in a unified diff to its patch (the hunks without headers).
+    
+    Recovers what the GitHub files API returns as "patch" from a diff that has
+    already been fetched, so enrichment does not list the PR's files again.
+    """
+    patches = {}
+    for path, _header, hunks in split_diff(diff):
+        if path and hunks:
+            patches[path] = "\n".join(hunks).rstrip("\n")
+    return patches
+
+
+def _line_prefix(hunk: str, max_chars: int) -> str:
+    """Return the longest whole-line prefix of hunk within max_chars, or "" if not even its first change line fits."""
+    if max_chars <= 0:
+        return ""
+    cut = hunk.rfind("\n", 0, max_chars + 1)
+    # Keep at least the "@@" header and one line after it
+    if cut <= hunk.find("\n"):
+        return ""
+    return hunk[:cut]
+
+
+@lru_cache(maxsize=32)
+def budget_diff(diff: str, max_chars: int) -> str:
+    """
+    Fit a diff into max_chars, cutting hunks only at line boundaries.
+    
+    Cached because every agent in a review budgets the same diff.
+    Generated files are dropped first, then whole hunks are added in order
+    until the budget is spent. When nothing of a file has been sent yet, a
+    hunk that does not fit is cut to the lines that do, so a large new file
+    (always a single hunk) is never dropped entirely. Other hunks that do
+    not fit are skipped (a later, smaller one may still fit). A note
+    records how many hunks were truncated or omitted.
+    """
+    kept: List[str] = []
+    reviewable: List[str] = []
+    used = 0
+    omitted = 0
+    truncated = 0
+    
+    for path, header, hunks in split_diff(diff):
+        if path and should_skip_file(path):
+            continue
+        reviewable.append("\n".join(header + hunks))
+        
+        header_text = "\n".join(header)
+        header_cost = len(header_text) + 1 if header else 0
+        if not hunks:
+            # Renames and mode changes carry no hunks but are still worth showing
+            if header and used + header_cost <= max_chars:
+                kept.append(header_text)
+                used += header_cost
+            continue
+        
+        header_written = False
+        for hunk in hunks:
+            cost = len(hunk) + 1 + (0 if header_written else header_cost)
+            if used + cost > max_chars:
+                # Only cut into the file's first hunk; later ones are skipped
+                prefix = "" if header_written else _line_prefix(hunk, max_chars - used - header_cost - 1)
+                if not prefix:
+                    omitted += 1
+                    continue
+                hunk = prefix
+                cost = len(hunk) + 1 + header_cost
+                truncated += 1
+            if not header_written and header:
+                kept.append(header_text)
+            header_written = True
+            kept.append(hunk)
+            used += cost
+    
+    if not kept:
+        # Not a unified diff, or not even one line of a hunk fits; fall back to a plain cut
+        return "\n".join(reviewable)[:max_chars]
+    
+    result = "\n".join(kept)
+    notes = []
+    if truncated:
+        notes.append(f"{truncated} hunk(s) truncated")
+    if omitted:
+        notes.append(f"{omitted} hunk(s) omitted")
+    if notes:
+        result += f"\n\n[{' and '.join(notes)} to fit the review size limit]"
+    return result
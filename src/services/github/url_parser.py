@@ -1,11 +1,14 @@
 """GitHub PR URL parser utility"""
 import re
+from functools import lru_cache
 from typing import Optional, Dict, Any
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 
 
 class ParsedPRUrl(BaseModel):
     """Parsed GitHub PR URL information"""
+    model_config = ConfigDict(frozen=True)
+    
     owner: str = Field(..., description="Repository owner")
     repo: str = Field(..., description="Repository name")
     pr_number: int = Field(..., description="Pull request number")
@@ -15,23 +18,21 @@ class ParsedPRUrl(BaseModel):
 class GitHubUrlParser:
     """Parse GitHub PR URLs and extract repository information"""
     
-    # Various GitHub PR URL patterns
-    PATTERNS = [
-        # Standard: https://github.com/owner/repo/pull/123
-        r'https?://github\.com/([^/]+)/([^/]+)/pull/(\d+)',
-        # With trailing slash: https://github.com/owner/repo/pull/123/
-        r'https?://github\.com/([^/]+)/([^/]+)/pull/(\d+)/',
-        # With fragments/queries: https://github.com/owner/repo/pull/123#issuecomment-123
-        r'https?://github\.com/([^/]+)/([^/]+)/pull/(\d+)[#?]',
-        # Short format (less common): github.com/owner/repo/pull/123
-        r'github\.com/([^/]+)/([^/]+)/pull/(\d+)',
-    ]
+    # One pattern covers every PR URL form: with or without scheme, and with
+    # a trailing slash, path, query or fragment (captured for extract_from_text)
+    PR_URL_PATTERN = re.compile(
+        r'(?:https?://)?github\.com/(?P<owner>[^/\s]+)/(?P<repo>[^/\s]+)/pull/(?P<pr_number>\d+)\S*'
+    )
+    _SHORT_PATTERN = re.compile(r'^([^/\s]+)/([^/\s]+)[/#](\d+)$')
+    _CANONICAL_PREFIX = "https://github.com/"
     
     @classmethod
     def parse(cls, pr_input: str) -> ParsedPRUrl:
         """
         Parse GitHub PR URL or direct input
         
+        Results are memoized per input; see _parse_cached.
+        
         Args:
             pr_input: Can be:
                 - Full URL: https://github.com/owner/repo/pull/123
@@ -44,22 +45,37 @@ class GitHubUrlParser:
         Raises:
             ValueError: If URL cannot be parsed
         """
-        pr_input = pr_input.strip()
+        return _parse_cached(pr_input.strip())
+    
+    @classmethod
+    def _parse(cls, pr_input: str) -> ParsedPRUrl:
+        """Parse a stripped PR URL or owner/repo/number input (uncached)."""
+        # Fast path for the canonical URL; anything unusual falls through
+        if pr_input.startswith(cls._CANONICAL_PREFIX):
+            parts = pr_input[len(cls._CANONICAL_PREFIX):].split("/", 4)
+            if len(parts) >= 4 and parts[2] == "pull":
+                owner, repo = parts[0], parts[1]
+                pr_number = parts[3].partition("#")[0].partition("?")[0]
+                names = owner + repo
+                if (
+                    owner and repo
+                    and " " not in names and names.isprintable()
+                    and pr_number.isascii() and pr_number.isdigit()
+                ):
+                    return ParsedPRUrl(owner=owner, repo=repo, pr_number=int(pr_number), url=pr_input)
         
-        # Try URL patterns
-        for pattern in cls.PATTERNS:
-            match = re.search(pattern, pr_input)
-            if match:
-                owner, repo, pr_number = match.groups()
-                return ParsedPRUrl(
-                    owner=owner,
-                    repo=repo,
-                    pr_number=int(pr_number),
-                    url=pr_input
-                )
+        # Try URL pattern
+        match = cls.PR_URL_PATTERN.search(pr_input)
+        if match:
+            return ParsedPRUrl(
+                owner=match.group("owner"),
+                repo=match.group("repo"),
+                pr_number=int(match.group("pr_number")),
+                url=pr_input
+            )
         
         # Try short format: owner/repo/123 or owner/repo#123
-        short_match = re.match(r'^([^/\s]+)/([^/\s]+)[/#](\d+)$', pr_input)
+        short_match = cls._SHORT_PATTERN.match(pr_input)
         if short_match:
             owner, repo, pr_number = short_match.groups()
             return ParsedPRUrl(
@@ -92,26 +108,14 @@ class GitHubUrlParser:
         Returns:
             ParsedPRUrl if found, None otherwise
         """
-        for pattern in cls.PATTERNS:
-            match = re.search(pattern, text)
-            if match:
-                owner, repo, pr_number = match.groups()
-                url_start = match.start()
-                url_end = match.end()
-                
-                # Try to get the full URL including any trailing parts
-                full_url_match = re.search(
-                    r'https?://github\.com/[^\s]+/pull/\d+[^\s]*',
-                    text
-                )
-                url = full_url_match.group(0) if full_url_match else text[url_start:url_end]
-                
-                return ParsedPRUrl(
-                    owner=owner,
-                    repo=repo,
-                    pr_number=int(pr_number),
-                    url=url
-                )
+        match = cls.PR_URL_PATTERN.search(text)
+        if match:
+            return ParsedPRUrl(
+                owner=match.group("owner"),
+                repo=match.group("repo"),
+                pr_number=int(match.group("pr_number")),
+                url=match.group(0)
+            )
         
         return None
     
@@ -125,6 +129,12 @@ class GitHubUrlParser:
             return False
 
 
+@lru_cache(maxsize=1024)
+def _parse_cached(pr_input: str) -> ParsedPRUrl:
+    """Memoized parse; ParsedPRUrl is frozen so instances are safe to share"""
+    return GitHubUrlParser._parse(pr_input)
+
+
 # Convenience functions for backward compatibility
 def parse_pr_url(url: str) -> Dict[str, Any]:
     """Parse PR URL and return dict (legacy interface)"""
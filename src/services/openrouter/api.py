@@ -1,21 +1,86 @@
+import asyncio
 import httpx
-from typing import Dict, Any, List, Optional
-from src.config import settings
+from typing import ClassVar, Dict, Any, List, Optional
+from src.config import get_settings
+from src.services.agent.cache import ReviewCache
+
+
+# Completion settings for analyze_code; part of its cache key
+ANALYSIS_TEMPERATURE = 0.3
+ANALYSIS_MAX_TOKENS = 1500
 
 
 class OpenRouterService:
     """Service for interacting with OpenRouter API (OpenAI-compatible)"""
     
+    # Focus of each analysis_type; unknown types fall back to "logic"
+    SYSTEM_PROMPTS: ClassVar[Dict[str, str]] = {
+        "logic": """You are an expert code reviewer focusing on logic and correctness.
+Analyze the code for:
+- Logic errors and bugs
+- Edge cases not handled
+- Incorrect algorithms
+- Potential runtime errors
+- Business logic issues""",
+        
+        "readability": """You are an expert code reviewer focusing on code readability and maintainability.
+Analyze the code for:
+- Code clarity and naming conventions
+- Code structure and organization
+- Documentation and comments
+- Consistency with best practices
+- Complexity that could be simplified""",
+        
+        "performance": """You are an expert code reviewer focusing on performance optimization.
+Analyze the code for:
+- Inefficient algorithms (O(n²) where O(n) possible)
+- Unnecessary loops or computations
+- Memory leaks or excessive memory usage
+- Database query optimization
+- Caching opportunities""",
+        
+        "security": """You are an expert code reviewer focusing on security vulnerabilities.
+Analyze the code for:
+- SQL injection vulnerabilities
+- XSS vulnerabilities
+- Authentication/authorization issues
+- Sensitive data exposure
+- Input validation issues
+- Insecure dependencies"""
+    }
+    
     def __init__(self):
-        self.base_url = settings.openrouter_base_url
-        self.api_key = settings.openrouter_api_key
-        self.model = settings.openrouter_model
+        settings = get_settings()
+        self.base_url = settings.OPENROUTER_BASE_URL
+        self.api_key = settings.OPENROUTER_API_KEY
+        self.model = settings.OPENROUTER_MODEL
         self.headers = {
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json",
             "HTTP-Referer": "http://localhost:8000",
             "X-Title": "PR Review Agent"
         }
+        self._http: Optional[httpx.AsyncClient] = None
+        # Exact-match results of analyze_code; re-reviews of unchanged code skip the LLM
+        self._analysis_cache = ReviewCache(max_entries=1024)
+    
+    @property
+    def http(self) -> httpx.AsyncClient:
+        """Shared keep-alive client, created on first use so calls reuse TLS connections."""
+        if self._http is None:
+            self._http = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers=self.headers,
+                timeout=httpx.Timeout(60.0, connect=5.0),
+                limits=httpx.Limits(max_connections=32, max_keepalive_connections=16)
+            )
+        return self._http
+    
+    async def aclose(self) -> None:
+        """Close the HTTP client's connection pool."""
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
     
     async def generate_completion(
         self,
@@ -39,22 +104,20 @@ class OpenRouterService:
                 "content": prompt
             })
             
-            async with httpx.AsyncClient(timeout=60.0) as client:
-                response = await client.post(
-                    f"{self.base_url}/chat/completions",
-                    headers=self.headers,
-                    json={
-                        "model": self.model,
-                        "messages": messages,
-                        "temperature": temperature,
-                        "max_tokens": max_tokens
-                    }
-                )
-                
-                response.raise_for_status()
-                data = response.json()
-                
-                return data["choices"][0]["message"]["content"]
+            response = await self.http.post(
+                "/chat/completions",
+                json={
+                    "model": self.model,
+                    "messages": messages,
+                    "temperature": temperature,
+                    "max_tokens": max_tokens
+                }
+            )
+            
+            response.raise_for_status()
+            data = response.json()
+            
+            return data["choices"][0]["message"]["content"]
         
         except Exception as e:
             raise Exception(f"OpenRouter API error: {str(e)}")
@@ -68,42 +131,8 @@ class OpenRouterService:
     ) -> Dict[str, Any]:
         """Analyze code using LLM with specific focus"""
         
-        system_prompts = {
-            "logic": """You are an expert code reviewer focusing on logic and correctness.
-Analyze the code for:
-- Logic errors and bugs
-- Edge cases not handled
-- Incorrect algorithms
-- Potential runtime errors
-- Business logic issues""",
-            
-            "readability": """You are an expert code reviewer focusing on code readability and maintainability.
-Analyze the code for:
-- Code clarity and naming conventions
-- Code structure and organization
-- Documentation and comments
-- Consistency with best practices
-- Complexity that could be simplified""",
-            
-            "performance": """You are an expert code reviewer focusing on performance optimization.
-Analyze the code for:
-- Inefficient algorithms (O(n²) where O(n) possible)
-- Unnecessary loops or computations
-- Memory leaks or excessive memory usage
-- Database query optimization
-- Caching opportunities""",
-            
-            "security": """You are an expert code reviewer focusing on security vulnerabilities.
-Analyze the code for:
-- SQL injection vulnerabilities
-- XSS vulnerabilities
-- Authentication/authorization issues
-- Sensitive data exposure
-- Input validation issues
-- Insecure dependencies"""
-        }
-        
-        system_prompt = system_prompts.get(analysis_type, system_prompts["logic"])
+        system_prompt = self.SYSTEM_PROMPTS.get(analysis_type, self.SYSTEM_PROMPTS["logic"])
+        context_block = f"Additional Context:\n{context}\n" if context else ""
         
         user_prompt = f"""File: {file_path}
 
@@ -112,7 +141,7 @@ Code Changes:
 {code_diff}
 ```
 
-{f"Additional Context:\n{context}\n" if context else ""}
+{context_block}
 
 Provide a structured review with:
 1. Issues found (be specific with line numbers if visible)
@@ -122,20 +151,34 @@ Provide a structured review with:
 Format your response as clear, actionable feedback. If no issues found, state "No issues found."
 """
         
+        cache_key = ReviewCache.make_key(
+            model=self.model,
+            analysis_type=analysis_type,
+            system_prompt=system_prompt,
+            user_prompt=user_prompt,
+            temperature=ANALYSIS_TEMPERATURE,
+            max_tokens=ANALYSIS_MAX_TOKENS
+        )
+        cached = self._analysis_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
         try:
             response = await self.generate_completion(
                 prompt=user_prompt,
                 system_prompt=system_prompt,
-                temperature=0.3,
-                max_tokens=1500
+                temperature=ANALYSIS_TEMPERATURE,
+                max_tokens=ANALYSIS_MAX_TOKENS
             )
             
-            return {
+            result = {
                 "analysis_type": analysis_type,
                 "file_path": file_path,
                 "findings": response,
                 "has_issues": "no issues found" not in response.lower()
             }
+            self._analysis_cache.set(cache_key, result)
+            return result
         
         except Exception as e:
             return {
@@ -145,3 +188,27 @@ Format your response as clear, actionable feedback. If no issues found, state "N
                 "has_issues": False,
                 "error": str(e)
             }
+    
+    async def analyze_batch(
+        self,
+        items: List[Dict[str, Any]],
+        concurrency: int = 8
+    ) -> List[Dict[str, Any]]:
+        """
+        Run analyze_code for several (file, analysis type) items concurrently.
+        
+        Args:
+            items: Keyword arguments for analyze_code, one dict per analysis
+            concurrency: Maximum number of completions in flight at once
+            
+        Returns:
+            Results in the same order as items
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+        
+        async def analyze_one(item: Dict[str, Any]) -> Dict[str, Any]:
+            async with semaphore:
+                return await self.analyze_code(**item)
+        
+        # analyze_code reports failures in its result instead of raising
+        return await asyncio.gather(*(analyze_one(item) for item in items))
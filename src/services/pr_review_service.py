@@ -1,22 +1,63 @@
 """PR Review Service - Fetches PR data and coordinates review."""
-from typing import Dict, Any, List, Optional
-from src.services.github.api import GitHubAPI
+import logging
+import re
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Dict, Any, List, Optional, Tuple
+from src.services.github.api import get_github_service
+from src.services.github.diff_utils import file_patches
 from src.services.github.url_parser import parse_github_pr_url
 from src.services.agent.orchestrator import OrchestratorAgent
 
 
+logger = logging.getLogger(__name__)
+
+# Parses the new-file start line from a unified diff hunk header (@@ -x,y +a,b @@)
+HUNK_HEADER_RE = re.compile(r'@@\s*-\d+,?\d*\s*\+(\d+),?\d*\s*@@')
+
+# Runs independent GitHub requests of one review side by side
+_github_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="github-fetch")
+
+
+@lru_cache(maxsize=256)
+def _number_patch_lines(patch: str) -> Tuple[Tuple[str, int], ...]:
+    """
+    Pair each patch line with its line number in the new file.
+    
+    Hunk headers are marked with -1 and lines before the first hunk with 0.
+    Cached so every issue on the same file shares one parse of its patch.
+    """
+    numbered = []
+    current_line = 0
+    for line in patch.split('\n'):
+        if line.startswith('@@'):
+            match = HUNK_HEADER_RE.search(line)
+            if match:
+                current_line = int(match.group(1))
+                numbered.append((line, -1))
+                continue
+        
+        numbered.append((line, current_line))
+        # Additions and context advance the new-file line counter
+        if current_line > 0 and not line.startswith('-'):
+            current_line += 1
+    
+    return tuple(numbered)
+
+
 class PRReviewService:
     """Service to fetch PR data and orchestrate code review."""
     
     def __init__(self):
         """Initialize the review service."""
-        self.github_api = GitHubAPI()
+        self.github_api = get_github_service()
         self.orchestrator = OrchestratorAgent()
     
     def review_pr_from_url(
         self, 
         pr_url: str,
-        selected_agents: Optional[List[str]] = None
+        selected_agents: Optional[List[str]] = None,
+        include_raw: bool = True
     ) -> Dict[str, Any]:
         """
         Review a PR given its GitHub URL.
@@ -24,6 +65,7 @@ class PRReviewService:
         Args:
             pr_url: Full GitHub PR URL (e.g., https://github.com/owner/repo/pull/123)
             selected_agents: Optional list of specific agents to run
+            include_raw: Keep each agent's issue list in agent_results
             
         Returns:
             Complete review report with all agent findings
@@ -41,37 +83,47 @@ class PRReviewService:
             repo = url_info["repo"]
             pr_number = url_info["pr_number"]
             
-            # Fetch PR data from GitHub
-            pr_data = self.github_api.get_pull_request(owner, repo, pr_number)
+            # Fetch PR metadata and diff from GitHub concurrently; they are
+            # independent requests, so this saves a full round trip
+            pr_data_future = _github_executor.submit(
+                self.github_api.get_pull_request, owner, repo, pr_number
+            )
+            diff_future = _github_executor.submit(
+                self.github_api.get_pull_request_diff, owner, repo, pr_number
+            )
+            
+            pr_data = pr_data_future.result()
             if not pr_data:
                 return {
                     "error": "Failed to fetch PR data",
                     "message": "Could not retrieve PR information from GitHub. Check the URL and your access token."
                 }
             
-            # Get PR diff
-            diff = self.github_api.get_pull_request_diff(owner, repo, pr_number)
-            if not diff:
+            # An empty diff (only deletions or generated files) is still
+            # reviewed; the agents answer it without calling the LLM
+            diff = diff_future.result()
+            if diff is None:
                 return {
                     "error": "Failed to fetch PR diff",
                     "message": "Could not retrieve PR changes from GitHub."
                 }
             
-            # Get the head SHA for fetching file contents
-            head_sha = pr_data.get("head_sha", pr_data.get("head", {}).get("sha", ""))
+            # Head SHA for fetching file contents
+            head_sha = pr_data["head_sha"]
             
-            # Prepare PR info for agents
+            # Prepare PR info for agents; get_pull_request always returns
+            # these keys, so they are read directly
             pr_info = {
                 "url": pr_url,
-                "title": pr_data.get("title", ""),
-                "description": pr_data.get("body", ""),
-                "author": pr_data.get("user", {}).get("login", "unknown"),
-                "state": pr_data.get("state", ""),
-                "created_at": pr_data.get("created_at", ""),
-                "updated_at": pr_data.get("updated_at", ""),
-                "additions": pr_data.get("additions", 0),
-                "deletions": pr_data.get("deletions", 0),
-                "changed_files": pr_data.get("changed_files", 0),
+                "title": pr_data["title"],
+                "description": pr_data["body"],
+                "author": pr_data["user"]["login"],
+                "state": pr_data["state"],
+                "created_at": pr_data["created_at"],
+                "updated_at": pr_data["updated_at"],
+                "additions": pr_data["additions"],
+                "deletions": pr_data["deletions"],
+                "changed_files": pr_data["changed_files"],
                 "owner": owner,
                 "repo": repo,
                 "pr_number": pr_number,
@@ -79,19 +131,18 @@ class PRReviewService:
             }
             
             # Run orchestrator to review the PR
-            review_result = self.orchestrator.review_pr(diff, pr_info, selected_agents)
+            review_result = self.orchestrator.review_pr(diff, pr_info, selected_agents, include_raw)
             
             
             if review_result.get("issues"):
-                # Fetch all file patches once
-                file_patches = self.github_api.get_pr_file_patches(owner, repo, pr_number)
-                
+                # Per-file patches come from the diff already fetched, saving
+                # a second paginated listing of the PR's files
                 self._enrich_issues_with_code_context(
                     review_result["issues"], 
                     owner, 
                     repo, 
                     head_sha,
-                    file_patches
+                    file_patches(diff)
                 )
             
             return review_result
@@ -107,7 +158,8 @@ class PRReviewService:
         self,
         diff: str,
         pr_info: Optional[Dict[str, Any]] = None,
-        selected_agents: Optional[List[str]] = None
+        selected_agents: Optional[List[str]] = None,
+        include_raw: bool = True
     ) -> Dict[str, Any]:
         """
         Review a PR given a manual diff input.
@@ -116,6 +168,7 @@ class PRReviewService:
             diff: Git diff text
             pr_info: Optional PR metadata
             selected_agents: Optional list of specific agents to run
+            include_raw: Keep each agent's issue list in agent_results
             
         Returns:
             Complete review report with all agent findings
@@ -131,7 +184,7 @@ class PRReviewService:
                 }
             
             # Run orchestrator
-            review_result = self.orchestrator.review_pr(diff, pr_info, selected_agents)
+            review_result = self.orchestrator.review_pr(diff, pr_info, selected_agents, include_raw)
             
             return review_result
             
@@ -166,13 +219,46 @@ class PRReviewService:
         """
         if file_patches is None:
             file_patches = {}
-            
+        
+        issues_by_file: Dict[str, List[Dict[str, Any]]] = {}
+        skipped = 0
         for issue in issues:
             file_path = issue.get("file")
-            line_number = issue.get("line")
-            
-            if not file_path or not line_number:
-                continue
+            if file_path and issue.get("line"):
+                issues_by_file.setdefault(file_path, []).append(issue)
+            else:
+                skipped += 1
+        if skipped:
+            logger.debug("Skipping code context for %d issue(s) without a file and line", skipped)
+        
+        # One task per file, run concurrently: the file's first lookup downloads
+        # it and the rest of its issues are served from the content cache
+        futures = [
+            _github_executor.submit(
+                self._enrich_file_issues,
+                file_issues,
+                owner,
+                repo,
+                ref,
+                file_patches.get(file_path)
+            )
+            for file_path, file_issues in issues_by_file.items()
+        ]
+        for future in futures:
+            future.result()
+    
+    def _enrich_file_issues(
+        self,
+        issues: List[Dict[str, Any]],
+        owner: str,
+        repo: str,
+        ref: str,
+        patch: Optional[str]
+    ) -> None:
+        """Enrich the issues of a single file with its code context and patch section."""
+        for issue in issues:
+            file_path = issue["file"]
+            line_number = issue["line"]
             
             try:
                 # Fetch the code context from GitHub
@@ -198,15 +284,14 @@ class PRReviewService:
                     }
                 
                 # Add the relevant patch/diff for this file if available
-                if file_path in file_patches:
-                    patch = file_patches[file_path]
+                if patch is not None:
                     # Extract relevant portion of patch around the line
                     relevant_patch = self._extract_relevant_patch_section(patch, line_number)
                     if relevant_patch:
                         issue["diff_patch"] = relevant_patch
                     
             except Exception as e:
-                print(f"Failed to enrich issue with code context: {e}")
+                logger.warning("Failed to enrich issue with code context: %s", e)
                 # Continue without code context if fetching fails
                 continue
     
@@ -223,40 +308,28 @@ class PRReviewService:
             Relevant portion of the patch or None
         """
         try:
-            lines = patch.split('\n')
             relevant_lines = []
-            current_line = 0
             in_relevant_section = False
             
-            for line in lines:
-                # Track line numbers from diff headers
-                if line.startswith('@@'):
-                    # Parse the line number from @@ -x,y +a,b @@
-                    import re
-                    match = re.search(r'@@\s*-\d+,?\d*\s*\+(\d+),?\d*\s*@@', line)
-                    if match:
-                        current_line = int(match.group(1))
-                        relevant_lines.append(line)
-                        continue
+            for line, line_number in _number_patch_lines(patch):
+                # Hunk headers are always kept for orientation
+                if line_number < 0:
+                    relevant_lines.append(line)
+                    continue
                 
                 # Check if we're near the target line
-                if current_line > 0:
-                    distance = abs(current_line - target_line)
-                    if distance <= context:
+                if line_number > 0:
+                    if abs(line_number - target_line) <= context:
                         in_relevant_section = True
                         relevant_lines.append(line)
                     elif in_relevant_section:
                         # We've passed the relevant section
                         break
-                    
-                    # Update current line for additions and context
-                    if not line.startswith('-'):
-                        current_line += 1
             
             if relevant_lines:
                 return '\n'.join(relevant_lines)
             return None
             
         except Exception as e:
-            print(f"Error extracting patch section: {e}")
+            logger.warning("Error extracting patch section: %s", e)
             return None
@@ -0,0 +1,245 @@
+"""Tests for the unified diff helpers used to build review prompts."""
+from src.services.github.diff_utils import (
+    budget_diff,
+    file_patches,
+    has_changes,
+    is_unchanged_diff,
+    split_diff,
+)
+
+
+GIT_DIFF = """diff --git a/app.py b/app.py
+index 1111111..2222222 100644
+--- a/app.py
++++ b/app.py
+@@ -1,2 +1,3 @@
+ import os
+-x = 1
++x = 2
++y = 3
+@@ -10,1 +11,1 @@ def main():
+-    return x
++    return y
+diff --git a/new.py b/new.py
+new file mode 100644
+index 0000000..3333333
+--- /dev/null
++++ b/new.py
+@@ -0,0 +1 @@
++print("hi")
+diff --git a/gone.py b/gone.py
+deleted file mode 100644
+index 4444444..0000000
+--- a/gone.py
++++ /dev/null
+@@ -1 +0,0 @@
+-print("bye")
+diff --git a/old_name.py b/new_name.py
+similarity index 100%
+rename from old_name.py
+rename to new_name.py
+diff --git a/logo.png b/logo.png
+new file mode 100644
+index 0000000..5555555
+Binary files /dev/null and b/logo.png differ
+"""
+
+# The form GitHubService.get_pull_request_diff builds from the files API
+BARE_DIFF = """--- a/one.py
++++ b/one.py
+@@ -1 +1 @@
+-a = 1
++a = 2
+
+--- a/two.py
++++ b/two.py
+@@ -3 +3,2 @@
+ b = 1
++c = 2
+"""
+
+
+def _new_file(path: str, lines: int) -> str:
+    """Build a git diff adding a file with the given number of lines."""
+    body = "\n".join(f"+line {i} of {path}" for i in range(lines))
+    return (
+        f"diff --git a/{path} b/{path}\n"
+        "new file mode 100644\n"
+        "--- /dev/null\n"
+        f"+++ b/{path}\n"
+        f"@@ -0,0 +1,{lines} @@\n"
+        f"{body}\n"
+    )
+
+
+def _edit(path: str, old: str, new: str) -> str:
+    """Build a git diff replacing one line of a file."""
+    return (
+        f"diff --git a/{path} b/{path}\n"
+        f"--- a/{path}\n"
+        f"+++ b/{path}\n"
+        "@@ -1 +1 @@\n"
+        f"-{old}\n"
+        f"+{new}\n"
+    )
+
+
+RENAME = """diff --git a/docs/a.md b/docs/b.md
+similarity index 100%
+rename from docs/a.md
+rename to docs/b.md
+"""
+
+
+def test_split_diff_git_form():
+    sections = split_diff(GIT_DIFF)
+
+    assert [path for path, _, _ in sections] == ["app.py", "new.py", "gone.py", "new_name.py", "logo.png"]
+
+    _, header, hunks = sections[0]
+    assert header[0] == "diff --git a/app.py b/app.py"
+    assert len(hunks) == 2
+    assert hunks[0].startswith("@@ -1,2 +1,3 @@")
+    assert hunks[1].startswith("@@ -10,1 +11,1 @@")
+
+    # Renames and binary files carry no hunks
+    assert sections[3][2] == []
+    assert sections[4][2] == []
+
+
+def test_split_diff_bare_form():
+    sections = split_diff(BARE_DIFF)
+
+    assert [path for path, _, _ in sections] == ["one.py", "two.py"]
+    assert sections[0][1] == ["--- a/one.py", "+++ b/one.py"]
+    assert sections[1][2][0].startswith("@@ -3 +3,2 @@")
+
+
+def test_file_patches():
+    patches = file_patches(GIT_DIFF)
+
+    # Files without hunks have no patch
+    assert set(patches) == {"app.py", "new.py", "gone.py"}
+    assert patches["new.py"] == '@@ -0,0 +1 @@\n+print("hi")'
+    assert "@@ -10,1 +11,1 @@" in patches["app.py"]
+
+    assert file_patches(BARE_DIFF)["two.py"] == "@@ -3 +3,2 @@\n b = 1\n+c = 2"
+
+
+def test_has_changes():
+    assert has_changes(GIT_DIFF)
+    assert has_changes(BARE_DIFF)
+    # File headers alone are not changes
+    assert not has_changes(RENAME)
+    assert not has_changes("--- a/x.py\n+++ b/x.py\n@@ -1 +1 @@\n unchanged\n")
+
+
+def test_has_changes_counts_lines_that_look_like_headers():
+    # Removing "-- comment" lines gives "--- comment" patch lines
+    sql = (
+        "diff --git a/schema.sql b/schema.sql\n"
+        "--- a/schema.sql\n"
+        "+++ b/schema.sql\n"
+        "@@ -1,3 +1,1 @@\n"
+        "--- drop me\n"
+        "--- and me\n"
+        " CREATE TABLE t (id int);\n"
+    )
+    assert has_changes(sql)
+    assert not is_unchanged_diff(sql)
+
+    # Adding "++ x" gives a "+++ x" patch line
+    added = "--- a/x.c\n+++ b/x.c\n@@ -1 +1,2 @@\n i = 0;\n+++ i;\n"
+    assert has_changes(added)
+
+
+def test_is_unchanged_diff():
+    assert is_unchanged_diff("")
+    assert is_unchanged_diff(RENAME)
+    assert not is_unchanged_diff(GIT_DIFF)
+    # Pasted code is not a diff, so it is still reviewed
+    assert not is_unchanged_diff("def f():\n    return 1\n")
+
+
+def test_budget_diff_keeps_small_diff_whole():
+    diff = _edit("a.py", "x = 1", "x = 2") + _edit("b.py", "y = 1", "y = 2")
+
+    result = budget_diff(diff, 10000)
+
+    assert "+x = 2" in result
+    assert "+y = 2" in result
+    assert "omitted" not in result
+    assert "truncated" not in result
+
+
+def test_budget_diff_skips_generated_files():
+    diff = _new_file("package-lock.json", 5) + _edit("a.py", "x = 1", "x = 2")
+
+    result = budget_diff(diff, 10000)
+
+    assert "package-lock.json" not in result
+    assert "+x = 2" in result
+
+
+def test_budget_diff_truncates_oversized_new_file():
+    readme = _edit("README.md", "Old", "New")
+    big = _new_file("big.py", 2000)
+
+    result = budget_diff(readme + big, 15000)
+
+    assert len(result) < 15000 + 100
+    assert "+New" in result
+    assert "+++ b/big.py" in result
+    assert "+line 0 of big.py" in result
+    assert "[1 hunk(s) truncated to fit the review size limit]" in result
+    # The cut is line-aligned
+    last_line = result.split("\n\n[")[0].split("\n")[-1]
+    assert last_line == f"+line {last_line.split()[1]} of big.py"
+
+
+def test_budget_diff_truncates_new_file_next_to_rename():
+    result = budget_diff(_new_file("big.py", 2000) + RENAME, 15000)
+
+    assert "+line 0 of big.py" in result
+    assert has_changes(result)
+
+
+def test_budget_diff_truncates_single_oversized_hunk():
+    result = budget_diff(_new_file("big.py", 2000), 1000)
+
+    assert result.startswith("diff --git a/big.py b/big.py")
+    assert "@@ -0,0 +1,2000 @@\n+line 0 of big.py" in result
+    assert "1 hunk(s) truncated" in result
+
+
+def test_budget_diff_skips_later_hunks_of_a_sent_file():
+    big_hunk = "\n".join(f"+line {i}" for i in range(500))
+    diff = (
+        "diff --git a/a.py b/a.py\n--- a/a.py\n+++ b/a.py\n"
+        "@@ -1 +1 @@\n-a\n+b\n"
+        f"@@ -50 +50,500 @@\n{big_hunk}\n"
+        "@@ -900 +1400 @@\n-c\n+d\n"
+    )
+
+    result = budget_diff(diff, 500)
+
+    assert "+b" in result
+    assert "+line 0" not in result
+    assert "+d" in result
+    assert "[1 hunk(s) omitted to fit the review size limit]" in result
+
+
+def test_budget_diff_sends_duplicate_files_separately():
+    diff = _edit("a/config.yml", "v: 1", "v: 2") + _edit("b/config.yml", "v: 1", "v: 2")
+
+    result = budget_diff(diff, 10000)
+
+    assert "+++ b/a/config.yml" in result
+    assert "+++ b/b/config.yml" in result
+    assert result.count("+v: 2") == 2
+
+
+def test_budget_diff_falls_back_to_plain_cut():
+    text = "def f():\n    return 1\n" * 100
+
+    assert budget_diff(text, 50) == text[:50]
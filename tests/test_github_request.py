@@ -0,0 +1,132 @@
+"""Tests for GitHubService._request rate-limit retries."""
+import asyncio
+import time
+from email.utils import formatdate
+
+import pytest
+
+httpx = pytest.importorskip("httpx")
+pytest.importorskip("github")
+pytest.importorskip("pydantic_settings")
+
+from src.services.github import api  # noqa: E402
+from src.services.github.api import GitHubService, GITHUB_API_URL, RATE_LIMIT_RETRIES  # noqa: E402
+
+
+def _service(responses):
+    """Build a service whose HTTP client answers with (status, headers) pairs in order, repeating the last."""
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        status, headers = responses[min(len(requests), len(responses)) - 1]
+        return httpx.Response(status, headers=headers)
+
+    # __init__ needs full settings; _request only uses the HTTP client
+    service = GitHubService.__new__(GitHubService)
+    service._http = httpx.AsyncClient(base_url=GITHUB_API_URL, transport=httpx.MockTransport(handler))
+    return service, requests
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Record asyncio.sleep delays instead of waiting."""
+    delays = []
+
+    async def fake_sleep(delay):
+        delays.append(delay)
+
+    monkeypatch.setattr(api.asyncio, "sleep", fake_sleep)
+    return delays
+
+
+def _request(service):
+    return asyncio.run(service._request("GET", "/repos/o/r"))
+
+
+def test_success_is_returned_without_retry(sleeps):
+    service, requests = _service([(200, {})])
+
+    assert _request(service).status_code == 200
+    assert len(requests) == 1
+    assert sleeps == []
+
+
+def test_retry_after_seconds_is_honored(sleeps):
+    service, requests = _service([
+        (429, {"Retry-After": "2"}),
+        (200, {}),
+    ])
+
+    assert _request(service).status_code == 200
+    assert len(requests) == 2
+    assert sleeps == [2.0]
+
+
+def test_retry_after_http_date_is_honored(sleeps):
+    retry_at = formatdate(time.time() + 10, usegmt=True)
+    service, requests = _service([
+        (403, {"Retry-After": retry_at}),
+        (200, {}),
+    ])
+
+    assert _request(service).status_code == 200
+    assert len(sleeps) == 1
+    assert 5 <= sleeps[0] <= 11
+
+
+def test_primary_limit_waits_until_reset(sleeps):
+    reset_at = str(int(time.time()) + 5)
+    service, requests = _service([
+        (403, {"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": reset_at}),
+        (200, {}),
+    ])
+
+    assert _request(service).status_code == 200
+    assert len(sleeps) == 1
+    assert 1 <= sleeps[0] <= 6
+
+
+def test_distant_reset_returns_immediately(sleeps):
+    reset_at = str(int(time.time()) + 3600)
+    service, requests = _service([
+        (403, {"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": reset_at}),
+    ])
+
+    assert _request(service).status_code == 403
+    assert len(requests) == 1
+    assert sleeps == []
+
+
+def test_long_retry_after_returns_immediately(sleeps):
+    service, requests = _service([(429, {"Retry-After": "600"})])
+
+    assert _request(service).status_code == 429
+    assert len(requests) == 1
+    assert sleeps == []
+
+
+def test_plain_forbidden_is_not_retried(sleeps):
+    service, requests = _service([(403, {})])
+
+    assert _request(service).status_code == 403
+    assert len(requests) == 1
+    assert sleeps == []
+
+
+def test_backoff_is_exponential_until_retries_run_out(sleeps):
+    service, requests = _service([(429, {})])
+
+    assert _request(service).status_code == 429
+    assert len(requests) == RATE_LIMIT_RETRIES + 1
+    assert sleeps == [max(2.0 ** attempt, 1.0) for attempt in range(RATE_LIMIT_RETRIES)]
+
+
+def test_invalid_retry_after_falls_back_to_backoff(sleeps):
+    service, requests = _service([
+        (429, {"Retry-After": "soon"}),
+        (200, {}),
+    ])
+
+    assert _request(service).status_code == 200
+    assert sleeps == [1.0]
@@ -0,0 +1,122 @@
+"""Tests for the agent result cache: expiry, eviction, single-flight and disk persistence."""
+import os
+import threading
+import time
+
+import pytest
+
+from src.services.agent.cache import ReviewCache
+
+
+RESULT = {"agent": "Security", "issues": [{"title": "x"}], "score": 90}
+
+
+def test_get_returns_private_copies():
+    cache = ReviewCache()
+    cache.set("k", RESULT)
+
+    first = cache.get("k")
+    first["issues"].append({"title": "added by caller"})
+
+    assert cache.get("k") == RESULT
+    assert cache.get("missing") is None
+
+
+def test_entries_expire_after_ttl():
+    cache = ReviewCache(ttl=0)
+    cache.set("k", RESULT)
+
+    assert cache.get("k") is None
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ReviewCache(max_entries=2)
+    cache.set("a", {"n": 1})
+    cache.set("b", {"n": 2})
+    cache.get("a")
+    cache.set("c", {"n": 3})
+
+    assert cache.get("a") == {"n": 1}
+    assert cache.get("b") is None
+    assert cache.get("c") == {"n": 3}
+
+
+def test_make_key_is_order_independent():
+    assert ReviewCache.make_key(a=1, b="x") == ReviewCache.make_key(b="x", a=1)
+    assert ReviewCache.make_key(a=1) != ReviewCache.make_key(a=2)
+
+
+def test_get_or_compute_runs_concurrent_callers_once():
+    cache = ReviewCache()
+    calls = []
+    started = threading.Event()
+    release = threading.Event()
+
+    def compute():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return dict(RESULT)
+
+    results = []
+    owner = threading.Thread(target=lambda: results.append(cache.get_or_compute("k", compute)))
+    owner.start()
+    assert started.wait(5)
+
+    waiters = [
+        threading.Thread(target=lambda: results.append(cache.get_or_compute("k", compute)))
+        for _ in range(3)
+    ]
+    for thread in waiters:
+        thread.start()
+    # Give the waiters time to find the in-flight computation
+    time.sleep(0.05)
+    release.set()
+    for thread in [owner, *waiters]:
+        thread.join(5)
+
+    assert len(calls) == 1
+    assert results == [RESULT] * 4
+    assert cache.get("k") == RESULT
+
+
+def test_get_or_compute_shares_but_does_not_store_errors():
+    cache = ReviewCache()
+    failed = {"agent": "Security", "error": "rate limited"}
+
+    assert cache.get_or_compute("k", lambda: failed) == failed
+    assert cache.get("k") is None
+    assert cache.get_or_compute("k", lambda: RESULT) == RESULT
+
+
+def test_get_or_compute_propagates_exceptions_and_retries():
+    cache = ReviewCache()
+
+    def boom():
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        cache.get_or_compute("k", boom)
+    assert cache.get_or_compute("k", lambda: RESULT) == RESULT
+
+
+def test_results_persist_to_disk_across_instances(tmp_path):
+    ReviewCache(disk_dir=str(tmp_path)).set("k", RESULT)
+
+    reloaded = ReviewCache(disk_dir=str(tmp_path))
+    assert reloaded.get("k") == RESULT
+
+    def compute():
+        raise AssertionError("should be served from disk")
+
+    assert ReviewCache(disk_dir=str(tmp_path)).get_or_compute("k", compute) == RESULT
+    # Writes are atomic: no temporary files are left behind
+    assert [path.name for path in tmp_path.iterdir()] == ["k.json"]
+
+
+def test_stale_disk_entries_are_ignored(tmp_path):
+    ReviewCache(disk_dir=str(tmp_path)).set("k", RESULT)
+    an_hour_ago = time.time() - 3600
+    os.utime(tmp_path / "k.json", (an_hour_ago, an_hour_ago))
+
+    assert ReviewCache(disk_dir=str(tmp_path), disk_ttl=60).get("k") is None